@@ -1,3 +1,5 @@
+import sys
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Tuple, List, Optional
 
 from app.search.Search import Search
@@ -20,6 +22,7 @@ class AppManager:
     def __init__(self):
         self._search = Search()
         self._browser = None
+        self._browser_future: Optional[Future] = None
         self._user_query_rewriter = UserQueryRewriter()
         self._page_inspector = None
         self._data_locator = None
@@ -48,7 +51,10 @@ class AppManager:
     def search(self, search_query: str) -> List[str]:
         """ Performs a web search using Google's API. """
         print(f"🤖 Searching for '{search_query}'...")
-        self._search.set_query(search_query)
+        try:
+            self._search.set_query(search_query)
+        except EnvironmentError as error:
+            sys.exit(str(error))
         urls = []
         results = True
         while results:
@@ -56,22 +62,34 @@ class AppManager:
             urls.extend(results)
         return urls
 
+    def start_browser(self) -> None:
+        """ Starts Google Chrome in a background thread, so it launches while the query is analyzed. """
+        if not self._browser and not self._browser_future:
+            executor = ThreadPoolExecutor(max_workers=1)
+            self._browser_future = executor.submit(Browser)
+            executor.shutdown(wait=False) # The thread ends once Chrome has started
+
     def open_browser(self) -> None:
-        """ Starts Google Chrome. """
+        """ Starts Google Chrome, or waits for it if it was started in the background. """
         if not self._browser:
-            self._browser = Browser()
+            self._browser = self._browser_future.result() if self._browser_future else Browser()
             self._page_inspector = PageInspector(self._browser)
             self._data_locator = DataLocator(self._browser)
 
     def browse(self, url: str, search_index: int) -> bool:
         """ Navigates to the URL and uses LLM vision to check for popups or captchas. """
+        FileManager.wait_for_deletions() # Old data files must be gone before new ones are written
         self._reset_scraper()
         print(f"🤖 Browsing {url}...")
         self._file_index = search_index + 1
         self._validator_failed = False
         self._browser.go_to_url(url)
         print("🤖 Checking if the page loaded correctly...")
-        loading_failed, issue = self._page_inspector.identify_loading_issues()
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            # The page text is extracted while waiting for the LLM to inspect the page
+            loading_issues = executor.submit(self._page_inspector.identify_loading_issues)
+            self._data_locator.prefetch_page_text()
+            loading_failed, issue = loading_issues.result()
         press_enter = "press Enter to continue..."
         if loading_failed:
             if issue == 'popup':
@@ -160,4 +178,5 @@ class AppManager:
             print(f"   Source: {self._browser.get_url()}")
             cost = round(Conversation.total_cost, 2)
             print(f"   Estimated cost: {'< $0.01' if cost < 0.01 else f'${cost}'}")        
+        FileManager.wait_for_deletions()
         self._browser.close()
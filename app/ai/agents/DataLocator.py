@@ -1,8 +1,10 @@
 import itertools
-import random
-from typing import List, Optional, Dict, Any, Tuple, Union
+import json
+from collections import Counter
+from typing import List, Optional, Dict, Any, Tuple, Union, Iterable, Iterator, Set
 from textwrap import dedent
-from string import Template
+
+import ahocorasick
 
 from app.navigation.Browser import Browser
 from app.ai.services.Conversation import Conversation
@@ -31,16 +33,21 @@ class DataLocator:
             ...
     """
 
-    GET_DATA_SAMPLE = Template(dedent("""
+    GET_DATA_SAMPLE_INSTRUCTIONS = dedent("""
+    The user will send you the data they requested and a website's text.
+    The website's text contains one html tag per line, long strings are truncated using ...
     Write a JSON array that contains the first data item, three in-between items, and last item the user requested.
     Make sure the last item is the bottomost item of relevant data and not the last item of the first section of the website.
     Copy the values literally from the website's text. Write valid JSON. Example:
     {"data": [{"country": "Austria", "capital": "Vienna", ...}, ..., {"country": "Sweden", "capital": "Stockholm", ...}]}
     Data should not have any value that's identical for all objects (no generic or null values allowed).
     If there's no relevant data in the website's text, return an empty array.
-    Data requested by the user: $query
-    Website's text (contains one html tag per line, long strings are truncated using ...): $text
-    """))
+    """)
+
+    GET_DATA_SAMPLE = dedent("""
+    Data requested by the user: {query}
+    Website's text: {text}
+    """)
 
     MAX_STRING_LENGTH = 100  # Max length of the strings in each html tag passed to the LLM
     MAX_TEXT_LENGTH = 50000  # Max length of the total text passed to the LLM
@@ -50,8 +57,12 @@ class DataLocator:
         self._browser: Browser = browser
         self._model_request = OpenAiRequest(Gpt4oMini(), json_response=True)
         self._conversation = Conversation(self._model_request)
+        self._conversation.add_system(self.GET_DATA_SAMPLE_INSTRUCTIONS)
         self._sample_strings: List[str] = []
         self._feedback: Optional[str] = None
+        self._page_texts: Dict[int, str] = {}  # Page text passed to the LLM by document version
+        self._last_sample_key: Optional[Tuple[int, str]] = None  # Document version and hash of the last sample
+        self._last_data: Optional[DocumentData] = None
 
     def find(self, user_query: str, file_name: str, attempts: int) -> Tuple[Tag, DataType]:
         """ Locates and returns the HTML container of the requested data. """
@@ -76,14 +87,19 @@ class DataLocator:
         distinct_children = self._remove_similar_children(data.container)
         return (distinct_children, DataType.DISTINCT_ITEMS)
     
+    def prefetch_page_text(self) -> None:
+        """ Extracts the page text in advance, it's cached by the document until the page changes. """
+        if self._browser.document.body:
+            self._browser.document.get_text(self.MAX_STRING_LENGTH)
+
     def set_feedback(self, feedback: str) -> None:
         """ Sets the feedback for the data locator. """
         self._feedback = feedback
 
     def _save_data(self, data: Tag, file_name: str) -> None:
-        """ Saves the data as an HTML file. """
-        with open(f'{file_name}.html', 'w', encoding='utf-8') as file:
-            file.write(str(data))
+        """ Saves the data as an HTML file, writing the UTF-8 bytes directly. """
+        with open(f'{file_name}.html', 'wb') as file:
+            file.write(data.encode('utf-8', formatter='minimal'))
 
     def _find_data(self, user_query: str, not_first_attempt: bool) -> Optional[DocumentData]:
         """ Locates and returns the HTML container of the requested data. """
@@ -103,9 +119,24 @@ class DataLocator:
         sample_data = self._generate_data_sample(user_query)
         if not sample_data:
             return None
+        sample_key = (self._browser.document.version, self._hash_sample(sample_data))
+        if sample_key != self._last_sample_key:
+            self._last_sample_key = sample_key
+            self._last_data = self._locate_sample_data(sample_data)
+        return self._last_data
+
+    def _hash_sample(self, sample_data: List[Dict[str, Any]]) -> str:
+        """ Returns a hash of the sample data, independent of the order of the keys. """
+        return StringUtils.get_hash(json.dumps(sample_data, sort_keys=True))
+
+    def _locate_sample_data(self, sample_data: List[Dict[str, Any]]) -> Optional[DocumentData]:
+        """ Finds the elements that contain the sample data and returns their container. """
         self._sample_strings = self._extract_sample_strings(sample_data)
-        data_elements1 = self._find_data_elements(sample_data[0])
-        data_elements2 = self._find_data_elements(sample_data[-1])
+        search_strings1 = self._get_search_strings(sample_data[0])
+        search_strings2 = self._get_search_strings(sample_data[-1])
+        elements_by_text = self._browser.document.find_elements_by_texts(search_strings1 + search_strings2)
+        data_elements1 = self._find_data_elements(search_strings1, elements_by_text)
+        data_elements2 = self._find_data_elements(search_strings2, elements_by_text)
         if not data_elements1 or not data_elements2:
             return None
         data_container_and_elements = self._find_data_container(data_elements1, data_elements2)
@@ -115,9 +146,8 @@ class DataLocator:
         """ Requests sample data from the model based on the user query and page text. """
         if not self._browser.document.body:
             self._browser.document.update(self._browser.get_main_html())
-        page_text = self._browser.document.get_text(self.MAX_STRING_LENGTH)
-        page_text = StringUtils.split_with_ellipsis(page_text, self.MAX_TEXT_LENGTH)
-        prompt = self.GET_DATA_SAMPLE.substitute(query=user_query, text=page_text)
+        page_text = self._get_page_text()
+        prompt = self.GET_DATA_SAMPLE.format(query=user_query, text=page_text)
         if self._feedback:
             prompt += f"\nUser feedback from the previous data location attempt: {self._feedback}"
         self._conversation.add_text(prompt)
@@ -126,6 +156,14 @@ class DataLocator:
             return answer['data']
         return None
 
+    def _get_page_text(self) -> str:
+        """ Returns the shortened page text, computed once per document version. """
+        version = self._browser.document.version
+        if version not in self._page_texts:
+            page_text = self._browser.document.get_text(self.MAX_STRING_LENGTH)
+            self._page_texts[version] = StringUtils.split_with_ellipsis(page_text, self.MAX_TEXT_LENGTH)
+        return self._page_texts[version]
+
     def _extract_sample_strings(self, sample_data: List[Dict[str, Any]]) -> List[str]:
         """ Extracts values from dictionaries as strings. """
         sample_strings = []
@@ -133,17 +171,15 @@ class DataLocator:
             sample_strings.extend(self._extract_values(item))
         return sample_strings
 
-    def _find_data_elements(self, sample_data: Dict[str, Any]) -> List[Tag]:
-        """ Finds and returns the HTML elements that contain the sample data. """
-        sample_strings = self._extract_values(sample_data)
-        sample_strings = [s.rstrip('.') if s.endswith('...') else s for s in sample_strings]
-        self._sample_strings = self._sample_strings + sample_strings
-        data_elements = []
-        for string in sample_strings:
-            new_data_elements = self._browser.document.find_elements_by_text(string)
-            if new_data_elements:
-                data_elements.extend(new_data_elements)
-        return data_elements
+    def _get_search_strings(self, sample_data: Dict[str, Any]) -> List[str]:
+        """ Returns the strings of a sample item without ellipses, adding them to the sample strings. """
+        sample_strings = [s.rstrip('.') if s.endswith('...') else s for s in self._extract_values(sample_data)]
+        self._sample_strings.extend(sample_strings)
+        return sample_strings
+
+    def _find_data_elements(self, sample_strings: List[str], elements_by_text: Dict[str, List[Tag]]) -> List[Tag]:
+        """ Returns the HTML elements that contain the sample strings. """
+        return [element for string in sample_strings for element in elements_by_text[string]]
     
     def _extract_values(self, item: Union[List, Dict]) -> List[str]:
         """ Recursively extracts a list of strings from a JSON object. """
@@ -158,12 +194,12 @@ class DataLocator:
     
     def _find_data_container(self, data_elements1, data_elements2) -> DocumentData:
         """ Finds and returns the data container and elements used to find it. """
-        element_pairs = self._pairs(data_elements1, data_elements2)
-        if len(element_pairs) > 1000:
-            element_pairs = random.sample(element_pairs, 1000)
+        ancestor_paths: Dict[int, List[Tag]] = {}
         data = []
-        for element1, element2 in element_pairs:
-            container = self._browser.document.find_common_ancestor(element1, element2)
+        for element1, element2 in self._pairs(data_elements1, data_elements2):
+            path1 = self._get_ancestor_path(element1, ancestor_paths)
+            path2 = self._get_ancestor_path(element2, ancestor_paths)
+            container = self._find_lowest_common_ancestor(path1, path2)
             data.append(DocumentData(container, element1, element2))
         data = self._filter_unique_containers(data)
         if len(data) == 1:
@@ -176,9 +212,27 @@ class DataLocator:
             return DocumentData()
         return max(data, key=lambda data: data.proportion)
 
-    def _pairs(self, list_a: List, list_b: List) -> List[Tuple]:
-        """ Returns all combinations of two distinct elements. """
-        return list(itertools.product(list_a, list_b))
+    def _get_ancestor_path(self, element: Tag, ancestor_paths: Dict[int, List[Tag]]) -> List[Tag]:
+        """ Returns the ancestors of the element from the root down, computing each path only once. """
+        path = ancestor_paths.get(id(element))
+        if path is None:
+            path = list(element.parents)
+            path.reverse()
+            ancestor_paths[id(element)] = path
+        return path
+
+    def _find_lowest_common_ancestor(self, path1: List[Tag], path2: List[Tag]) -> Optional[Tag]:
+        """ Returns the deepest ancestor shared by two root-to-element ancestor paths. """
+        common_ancestor = None
+        for ancestor1, ancestor2 in zip(path1, path2):
+            if ancestor1 is not ancestor2:
+                break
+            common_ancestor = ancestor1
+        return common_ancestor
+
+    def _pairs(self, list_a: List, list_b: List) -> Iterator[Tuple]:
+        """ Yields all combinations of two distinct elements, without building the full list. """
+        return itertools.product(list_a, list_b)
 
     def _filter_unique_containers(self, data: List[DocumentData]) -> List[DocumentData]:
         """ Filters out duplicate containers from the data. """
@@ -186,21 +240,47 @@ class DataLocator:
     
     def _filter_data(self, data: List[DocumentData]) -> List[DocumentData]:
         """ Filters data based on the proportion of sample text found in each container. """
+        string_counts = Counter(string.lower() for string in self._sample_strings)
+        automaton = self._build_automaton(string_counts)
         filtered_data = []
         for item in data:
             container_text = item.container.get_text().lower()
-            strings_found = sum(string.lower() in container_text for string in self._sample_strings)
+            strings_found = string_counts[''] # Empty strings are found in any text
+            if automaton:
+                unique_strings_found = self._find_strings(automaton, container_text)
+                strings_found += sum(string_counts[string] for string in unique_strings_found)
             item.proportion = strings_found / len(self._sample_strings)
             if item.proportion > 0.35:
                 filtered_data.append(item)
         return filtered_data
 
+    def _build_automaton(self, strings: Iterable[str]) -> Optional[ahocorasick.Automaton]:
+        """ Builds an Aho-Corasick automaton to find all the strings in a text with a single pass. """
+        automaton = ahocorasick.Automaton()
+        for string in strings:
+            if string:
+                automaton.add_word(string, string)
+        if not len(automaton):
+            return None
+        automaton.make_automaton()
+        return automaton
+
+    def _find_strings(self, automaton: ahocorasick.Automaton, text: str) -> Set[str]:
+        """ Returns the automaton strings found in the text, stopping as soon as all have been found. """
+        strings_found = set()
+        for _, string in automaton.iter(text):
+            strings_found.add(string)
+            if len(strings_found) == len(automaton):
+                break
+        return strings_found
+
     def _filter_wrappers(self, data: List[DocumentData]) -> List[DocumentData]:
         """ Filters out data with containers that are wrappers of the other containers. """
+        ancestor_ids = {id(d.container): {id(ancestor) for ancestor in d.container.parents} for d in data}
         filtered_data = []
         for data_a in data:
-            if not any(data_b.container.is_descendant_of(data_a.container)
-                    for data_b in data if data_a.proportion == data_b.proportion and data_a != data_b):
+            if not any(id(data_a.container) in ancestor_ids[id(data_b.container)]
+                    for data_b in data if data_a.proportion == data_b.proportion and data_a is not data_b):
                 filtered_data.append(data_a)
         return filtered_data
 
@@ -214,13 +294,15 @@ class DataLocator:
             return None
 
     def _remove_similar_children(self, container: Tag) -> Tag:
-        """ Removes children with the same name and attributes from the container. """
-        container = container.copy()
-        name = container.name
-        attributes = container.attrs
-        pruned_container = self._browser.document.html.new_tag(name, **attributes)
-        container.remove_children_style()
-        distinct_children = self._browser.document.find_distinct_children(container)
-        for child in distinct_children:
-            pruned_container.append(child.copy())
-        return pruned_container
\ No newline at end of file
+        """ Returns a copy of the container without children with the same name and attributes. """
+        pruned_container = self._browser.document.html.new_tag(container.name, attrs=dict(container.attrs))
+        similarity_keys = set()
+        for child in container.find_all(recursive=False):
+            similarity_key = child.similarity_key(ignore=('id', 'style'))
+            if similarity_key in similarity_keys:
+                continue
+            similarity_keys.add(similarity_key)
+            child_copy = child.copy()
+            child_copy.attrs.pop('style', None)
+            pruned_container.append(child_copy)
+        return pruned_container
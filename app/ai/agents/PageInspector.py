@@ -1,10 +1,11 @@
+import os
 from typing import Tuple
 from textwrap import dedent
 
 from app.navigation.Browser import Browser
 from app.ai.services.OpenAiRequest import OpenAiRequest
 from app.ai.services.Conversation import Conversation
-from app.ai.services.openai_models import Gpt4o
+from app.ai.services.openai_models import Gpt4o, Gpt4oMini
 
 class PageInspector:
     """
@@ -19,8 +20,12 @@ class PageInspector:
                 print("Please close the popup.")
             elif issue == 'captcha':
                 print("Please verify you are a human.")
+
+    Set the environment variable 'STRICT_PAGE_INSPECTOR=on' to use GPT-4o instead of GPT-4o mini.
     """
 
+    STRICT_ENVIRONMENT_VAR = 'STRICT_PAGE_INSPECTOR'
+
     IDENTIFY_LOADING_ISSUES = dedent("""
     The image contains a screenshot of a web page. 
     Return a valid JSON object with three boolean values:
@@ -35,7 +40,9 @@ class PageInspector:
     def __init__(self, browser: Browser) -> None:
         """ Creates a conversation. """
         self.browser: Browser = browser
-        model_request = OpenAiRequest(Gpt4o(), max_tokens=500, json_response=True)
+        strict = os.getenv(self.STRICT_ENVIRONMENT_VAR, 'off').lower() == 'on'
+        model = Gpt4o() if strict else Gpt4oMini()
+        model_request = OpenAiRequest(model, temperature=0, max_tokens=300, json_response=True)
         self.conversation = Conversation(model_request)
         self.html_before: str
 
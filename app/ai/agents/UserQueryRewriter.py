@@ -1,3 +1,4 @@
+import os
 from typing import Dict, Any, Optional, Tuple
 from textwrap import dedent
 from string import Template
@@ -5,7 +6,7 @@ from datetime import date
 
 from app.ai.services.OpenAiRequest import OpenAiRequest
 from app.ai.services.Conversation import Conversation
-from app.ai.services.openai_models import Gpt4o
+from app.ai.services.openai_models import Gpt4o, Gpt4oMini
 
 class UserQueryRewriter:
     """
@@ -20,8 +21,12 @@ class UserQueryRewriter:
             print(prompt_rewriter.url)
         else:
             print(prompt_rewriter.search_query)
+
+    Set the environment variable 'STRICT_QUERY_REWRITER=on' to use GPT-4o instead of GPT-4o mini.
     """
 
+    STRICT_ENVIRONMENT_VAR = 'STRICT_QUERY_REWRITER'
+
     REWRITE_USER_PROMPT = Template(dedent("""
     This is the user's query for an AI web scraper that returns JSON data: "$user_prompt".
     Return a valid JSON object with three key-value pairs:
@@ -40,7 +45,9 @@ class UserQueryRewriter:
 
     def __init__(self) -> None:
         """ Creates a conversation. """
-        model_request = OpenAiRequest(Gpt4o(), max_tokens=2048, json_response=True)
+        strict = os.getenv(self.STRICT_ENVIRONMENT_VAR, 'off').lower() == 'on'
+        model = Gpt4o() if strict else Gpt4oMini()
+        model_request = OpenAiRequest(model, temperature=0, max_tokens=2048, json_response=True)
         self._conversation = Conversation(model_request)
 
     def rewrite(self, user_query: str) -> None:
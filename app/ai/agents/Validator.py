@@ -1,9 +1,8 @@
-import json
-import random
-from string import Template
 from textwrap import dedent
 from typing import Optional, List, Dict, Any
 
+import orjson
+
 from app.ai.services.OpenAiRequest import OpenAiRequest
 from app.ai.services.Conversation import Conversation
 from app.ai.data.ScrapedData import ScrapedData
@@ -29,10 +28,9 @@ class Validator:
             print(f"The data found is not valid. {self._validator.error}\n")
     """
 
-    VALIDATE_JSON = Template(dedent("""
-    The following represents a sample of an array of data scrapped from a website: $data_sample
-    Note the actual JSON file contains $remaining_data_length more objects, I only showed you 2 for brevity.
-    Check if the sampled JSON objects match the user query: $user_intent
+    VALIDATE_JSON_INSTRUCTIONS = dedent("""
+    The user will send you a sample of an array of data scrapped from a website and their query.
+    Check if the sampled JSON objects match the user query.
     Do the objects contain enough information to answer the user's request?
     Return a valid JSON object with values:
     - data_description: A short description of the sampled objects with respect to the user's request.
@@ -41,16 +39,22 @@ class Validator:
     Important: The data comes from a Google search, so in case of ambiguity, always assume it's relevant.
     Only consider the data invalid if it's completely unrelated to the user's request or
     if each object contains too few values to consider it a useful answer. False negatives are unacceptable.
-    """))
+    """)
 
-    DATA_SAMPLE_SIZE = 2
+    VALIDATE_JSON = dedent("""
+    Data sample: {data_sample}
+    Note the actual JSON file contains {remaining_data_length} more objects, I only showed you the first and middle ones for brevity.
+    User query: {user_intent}
+    """)
 
-    data: List[ScrapedData] = []
+    DATA_SAMPLE_SIZE = 2
 
     def __init__(self) -> None:
-        """ Initializes the Validator with a Conversation. """
+        """ Initializes the Validator with a Conversation and an empty data list. """
+        self.data: List[ScrapedData] = []
         model_request = OpenAiRequest(Gpt4o(), json_response=True)
         self._conversation = Conversation(model_request)
+        self._conversation.add_system(self.VALIDATE_JSON_INSTRUCTIONS)
         self.error: str
 
     def load_data_file(self, url: str, file_name: str) -> Optional[ScrapedData]:
@@ -66,8 +70,8 @@ class Validator:
     def _load_file_content(self, file_name: str):
         """ Loads the content of the given file and returns it, or None if there's an error. """
         try:
-            with open(file_name, 'r', encoding='utf-8') as file:
-                json_content = json.load(file)
+            with open(file_name, 'rb') as file:
+                json_content = orjson.loads(file.read())
             if not json_content:
                 raise ValueError("File is empty")
             return json_content
@@ -84,11 +88,12 @@ class Validator:
     
     @staticmethod
     def get_data_item_sample(item: ScrapedData) -> str:
-        """ Returns a sample of a few objects in the given list. """
+        """ Returns a sample of evenly spaced objects in the given list (first and middle for two). """
         if item.length <= Validator.DATA_SAMPLE_SIZE:
-            return json.dumps(item.content)
-        sample = random.sample(item.content, Validator.DATA_SAMPLE_SIZE)
-        sample_with_ellipsis = json.dumps(sample)[:-2] + '}, ...]'
+            return orjson.dumps(item.content).decode('utf-8')
+        step = item.length // Validator.DATA_SAMPLE_SIZE
+        sample = item.content[:step * Validator.DATA_SAMPLE_SIZE:step]
+        sample_with_ellipsis = orjson.dumps(sample).decode('utf-8')[:-2] + '}, ...]'
         return sample_with_ellipsis
 
     def _generate_validation(self, user_intent: str, data_sample: str) -> Optional[Dict[str, Any]]:
@@ -101,7 +106,7 @@ class Validator:
     def _write_prompt(self, user_intent: str, data_sample: str) -> str:
         """ Writes a prompt for the LLM to compare the data with the user's intent. """
         remaining_data_length = self.data[-1].length - self.DATA_SAMPLE_SIZE
-        prompt = self.VALIDATE_JSON.substitute(
+        prompt = self.VALIDATE_JSON.format(
             data_sample = data_sample,
             remaining_data_length = remaining_data_length,
             user_intent = user_intent
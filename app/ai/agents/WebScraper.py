@@ -1,19 +1,17 @@
-import re # pylint: disable=unused-import
-import os # pylint: disable=unused-import
-import json
+import os
+import subprocess
 import sys
-from io import StringIO
 import traceback
-from string import Template
 from textwrap import dedent
-from typing import Dict, Optional
+from typing import Dict, Optional, Union
 
-from bs4 import BeautifulSoup # pylint: disable=unused-import
+import orjson
 
 from app.ai.services.AnthropicRequest import AnthropicRequest
 from app.ai.services.Conversation import Conversation
 from app.ai.data.DataType import DataType
 from app.navigation.ExtendedTag import ExtendedTag as Tag
+from app.navigation.LxmlTag import LxmlTag
 from app.ai.data.ScrapedData import ScrapedData
 from app.ai.data.FeedbackData import FeedbackData
 from app.ai.utils.StringUtils import StringUtils
@@ -35,11 +33,13 @@ class WebScraper:
         if feedback:
             web_scraper.set_feedback(scraped_data, feedback)
         web_scraper.scrape(user_intent, file_name)
+
+    Set the environment variable 'HTML_CLEANER=bs4' to clean the HTML with BeautifulSoup instead of lxml.
     """
 
-    WRITE_SCRIPT = Template(dedent("""
-    Write a web scraper to extract the data the user requested from $file_name.html
-    using BeautifulSoup and save it as $file_name.json. Extract as much data as possible.
+    WRITE_SCRIPT = dedent("""
+    Write a web scraper to extract the data the user requested from {file_name}.html
+    using BeautifulSoup and save it as {file_name}.json. Extract as much data as possible.
     The resulting JSON should be an array of objects with the same keys.
     Before writing the script, briefly describe your strategy:
         1. Locate the data in the HTML that best matches the user's request
@@ -48,14 +48,15 @@ class WebScraper:
         4. How you will clean the data?
         5. How will you handle missing data and errors?
     Your answer should include a single valid python code block without comments.
-    Load the data using: "with open('$file_name.html', 'r') as file: html = file.read()"
+    Load the data using: "with open('{file_name}.html', 'r') as file: html = file.read()"
     Include print statements to help debug the script in case something goes wrong.
-    $user_intent
-    """))
+    {user_intent}
+    """)
 
-    REWRITE_SCRIPT1 = Template("The data extracted by the script doesn't meet the users expectations. Script output: $script_output")
-    REWRITE_SCRIPT2 = Template("Sample of two data items (the actual JSON file has $data_length objects): $data_sample")
-    REWRITE_SCRIPT3 = Template("User feedback: $feedback")
+    PREVIOUS_SCRIPT = "Previous script:\n```python\n{script}\n```\n"
+    REWRITE_SCRIPT1 = "The data extracted by the script doesn't meet the users expectations. Script output: {script_output}"
+    REWRITE_SCRIPT2 = "Sample of two data items (the actual JSON file has {data_length} objects): {data_sample}"
+    REWRITE_SCRIPT3 = "User feedback: {feedback}"
 
     DATA_DESCRIPTION_INTRO = "The following is a small sample from the html file. It contains "
     TABLE_SAMPLE = "the first rows of the table that contains the data:"
@@ -66,7 +67,41 @@ class WebScraper:
     MAX_HTML_LENGTH = 50000
     MAX_OUTPUT_LENGTH = 5000
     MAX_RETRIES = 2
+    SCRIPT_TIMEOUT = 60  # Seconds
+
+    MAX_TRACEBACK_FRAMES = 10  # Outermost frames of the script's traceback, library internals are cut
+
+    # Runs the script read from stdin in a new Python process, with the modules scripts usually need imported.
+    # Only the first characters printed (argument 1) are kept, so large outputs are never buffered.
+    # Errors print at most the first traceback frames (argument 2), without chained exceptions.
+    SCRIPT_RUNNER = dedent("""
+    import io, json, os, re, sys, traceback
+    from bs4 import BeautifulSoup
+
+    class BoundedWriter(io.TextIOBase):
+        def __init__(self, stream, max_length):
+            self.stream = stream
+            self.remaining = max_length
+        def write(self, text):
+            if self.remaining > 0:
+                self.stream.write(text[:self.remaining])
+                self.remaining -= len(text)
+            return len(text)
+        def flush(self):
+            self.stream.flush()
+
+    sys.stdout = BoundedWriter(sys.stdout, int(sys.argv[1]))
+    try:
+        exec(compile(sys.stdin.read(), 'script.py', 'exec'))
+    except Exception:
+        traceback.print_exc(limit=int(sys.argv[2]), chain=False)
+        sys.exit(1)
+    """)
+
+    MAX_CACHED_SAMPLES = 16
+    _clean_html_cache: Dict[str, str] = {}  # Cleaned html samples by cleaner and hash of the html before cleaning
 
+    CLEANER_ENVIRONMENT_VAR = 'HTML_CLEANER'
     TAGS_TO_REMOVE = ['link', 'script', 'style', 'meta']
     ATTRIBUTES_TO_STRIP = [
         'lang', 'dir', 'style', 'width', 'height', 'rel', 'target', 'tabindex', 'frameborder', 'marginheight',
@@ -82,20 +117,36 @@ class WebScraper:
         self.html_sample_type: DataType
         self._feedback: Optional[Dict] = None
         self._script_output = ""
+        self._script = ""  # Last script run, included in the prompt when rewriting it from feedback
 
     def set_source(self, html: Tag, data_type: DataType) -> None:
         """ Set the html sample to be fed to the LLM. """
-        self.html_sample = self.clean_html(html)
+        self.html_sample = self._get_clean_html(html)
         self.html_sample_type: DataType = data_type
 
-    def clean_html(self, html: Tag) -> str:
+    def _get_clean_html(self, html: Tag) -> str:
+        """ Returns the cleaned html, reusing it if the same html was cleaned before with the same cleaner. """
+        cache = WebScraper._clean_html_cache
+        html_string = str(html) # Serialized once, for the hash and the lxml cleaner
+        lxml_cleaner = self._uses_lxml_cleaner()
+        key = f"{'lxml' if lxml_cleaner else 'bs4'}:{StringUtils.get_hash(html_string)}"
+        if key in cache:
+            return cache[key]
+        clean_html = self.clean_html(LxmlTag(html_string) if lxml_cleaner else html)
+        while len(cache) >= self.MAX_CACHED_SAMPLES:
+            del cache[next(iter(cache))]
+        cache[key] = clean_html
+        return clean_html
+
+    def _uses_lxml_cleaner(self) -> bool:
+        """ True unless the environment variable selects the BeautifulSoup cleaner. """
+        return os.getenv(self.CLEANER_ENVIRONMENT_VAR, 'lxml').lower() != 'bs4'
+
+    def clean_html(self, html: Union[Tag, LxmlTag]) -> str:
         """ Remove HTML elements irrelevant for web scraping. """
-        html = html.shorten_text(100)
-        html = html.remove_comments()
-        html = html.remove_tags(self.TAGS_TO_REMOVE)
-        html = html.clear_svg_contents()
-        html = html.strip_attributes(self.ATTRIBUTES_TO_STRIP)
-        html = html.shorten_src(50)
+        if isinstance(html, Tag) and self._uses_lxml_cleaner():
+            html = LxmlTag.from_tag(html)
+        html = html.clean(self.TAGS_TO_REMOVE, self.ATTRIBUTES_TO_STRIP, max_text=100, max_src=50)
         html = html.minify()
         html = StringUtils.trim_with_ellipsis(html, self.MAX_HTML_LENGTH)
         return html
@@ -107,23 +158,21 @@ class WebScraper:
     def scrape(self, user_intent: str, file_name: str) -> None:
         """ Generate a web scraping script and run it. """
         file_name = f'{file_name}'
-        script = self._generate_script(user_intent, file_name)
-        error = self._run_script(script, file_name)
+        self._script = self._generate_script(user_intent, file_name)
+        error = self._run_script(self._script, file_name)
         retries = 0
         while error and retries < self.MAX_RETRIES:
-            script = self._regenerate_script()
-            error = self._run_script(script, file_name)
+            self._script = self._regenerate_script()
+            error = self._run_script(self._script, file_name)
             retries += 1
             
     def _generate_script(self, user_intent: str, file_name: str) -> str:
         """ Generate a web scraping script based on a prompt. """
         prompt = self._write_prompt(user_intent, file_name)
-        if not self._feedback:
-            self.conversation.add_text(prompt)
-        else:
-            self.conversation.replace_first_message(prompt)
-            feedback = self._rewrite_prompt()
-            self.conversation.add_text(feedback)
+        if self._feedback:
+            self.conversation.reset() # A single message with the prompt and the feedback replaces the last attempt
+            prompt = f"{prompt}\n\n{self._rewrite_prompt()}"
+        self.conversation.add_text(prompt)
         return self.conversation.request_answer()
 
     def _regenerate_script(self) -> str:
@@ -133,29 +182,32 @@ class WebScraper:
 
     def _write_prompt(self, user_intent: str, file_name: int) -> str:
         """ Writes the initial prompt for the LLM. """
-        prompt = self.WRITE_SCRIPT.substitute(user_intent=user_intent, file_name=file_name)
-        data_description = self._get_data_description()
-        prompt += data_description
+        prompt_parts = [
+            self.WRITE_SCRIPT.format(user_intent=user_intent, file_name=file_name).lstrip(), # So strip doesn't copy the html
+            self._get_data_description()
+        ]
         if len(self.html_sample) > self.MAX_HTML_LENGTH:
-            prompt += "\n" + "The complete html is too long and has been truncated."
-        prompt += "\n" + self.html_sample
-        return prompt.strip()
+            prompt_parts.append("\nThe complete html is too long and has been truncated.")
+        prompt_parts.append("\n")
+        prompt_parts.append(self.html_sample)
+        return "".join(prompt_parts).strip()
 
     def _rewrite_prompt(self) -> str:
         """ Writes the prompt to rewrite the script based on feedback. """
-        prompt = self.REWRITE_SCRIPT1.substitute(
+        prompt_parts = [self.PREVIOUS_SCRIPT.format(script=self._script)] if self._script else []
+        prompt_parts.append(self.REWRITE_SCRIPT1.format(
             script_output=self._script_output,
-        )
+        ))
         if self._feedback.data_length:
-            prompt += self.REWRITE_SCRIPT2.substitute(
+            prompt_parts.append(self.REWRITE_SCRIPT2.format(
                 data_sample=self._feedback.sample,
                 data_length=self._feedback.data_length
-            )
+            ))
         if self._feedback.description:
-            prompt += self.REWRITE_SCRIPT3.substitute(
+            prompt_parts.append(self.REWRITE_SCRIPT3.format(
                 feedback=self._feedback.description
-            )
-        return prompt.strip()
+            ))
+        return "".join(prompt_parts).strip()
 
     def _get_data_description(self) -> str:
         """ Returns a description of the data in the html sample. """
@@ -168,22 +220,34 @@ class WebScraper:
         return self.DATA_DESCRIPTION_INTRO + data_description_type
 
     def _run_script(self, script: str, file_name: str) -> bool:
-        """ Run script, capture print output, check the output file exists. """
-        captured_output = StringIO()
-        sys_stdout = sys.stdout
+        """ Run script in a separate process, capture print output, check the output file exists. """
         try:
-            sys.stdout = captured_output
-            exec(script) # pylint: disable=exec-used
-            with open(f'{file_name}.json', 'r', encoding='utf-8') as file:
-                json.load(file)
-            self._script_output = captured_output.getvalue()
+            process = subprocess.run(
+                [sys.executable, '-c', self.SCRIPT_RUNNER, str(self.MAX_OUTPUT_LENGTH + 1), str(self.MAX_TRACEBACK_FRAMES)],
+                input=script,
+                capture_output=True,
+                text=True,
+                encoding='utf-8',
+                errors='replace',
+                env={**os.environ, 'PYTHONIOENCODING': 'utf-8'},
+                timeout=self.SCRIPT_TIMEOUT,
+                check=False
+            )
+            if process.returncode != 0:
+                self._script_output = f"Rewrite the script: \n{process.stderr}"
+                return True
+            with open(f'{file_name}.json', 'rb') as file:
+                orjson.loads(file.read())
+            self._script_output = process.stdout
             return False
-        except Exception: # pylint: disable=broad-exception-caught
-            self._script_output = f"Rewrite the script: \n{traceback.format_exc()}"
+        except subprocess.TimeoutExpired:
+            self._script_output = f"Rewrite the script: \nThe script didn't finish in {self.SCRIPT_TIMEOUT} seconds."
+            return True
+        except Exception as e: # pylint: disable=broad-exception-caught
+            error = ''.join(traceback.format_exception(e, limit=self.MAX_TRACEBACK_FRAMES, chain=False))
+            self._script_output = f"Rewrite the script: \n{error}"
             return True
         finally:
-            sys.stdout = sys_stdout
-            captured_output.close()
             self._limit_output_length()
 
     def _limit_output_length(self) -> None:
@@ -2,7 +2,7 @@ from dataclasses import dataclass
 from typing import Optional
 from app.navigation.ExtendedTag import ExtendedTag as Tag
 
-@dataclass
+@dataclass(slots=True)
 class DocumentData:
     """ Html element that contains data, elements used to find it and proportion of data it contains. """
     container: Optional[Tag] = None
@@ -7,6 +7,8 @@ from app.ai.agents.Validator import Validator
 class FeedbackData:
     """ A sample of the scraped data and feedback about how to improve the scraping process. """
 
+    __slots__ = ('sample', 'data_length', 'description')
+
     def __init__(self,
             data: Optional[ScrapedData],
             description: Optional[str]
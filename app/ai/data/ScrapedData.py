@@ -1,19 +1,19 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import List, Dict, Optional
 
-@dataclass
+@dataclass(slots=True)
 class ScrapedData:
     """ Contains data scraped from a web page, source url and the name of the file where it's stored. """
 
     file_name: str
     url: str
-    content: Optional[List[Dict]] = None
+    content: Optional[List[Dict]] = field(default=None, repr=False)  # Can hold thousands of objects
+    length: int = field(init=False, default=0)
 
-    @property
-    def length(self):
-        return len(self.content) if self.content else 0
+    def __post_init__(self):
+        """ Counts the objects in the content once. """
+        self.length = len(self.content) if self.content else 0
 
     def __str__(self):
-        if self.content is None:
-            return ""
-        return str(self.content)
\ No newline at end of file
+        """ Describes the data without serializing the content. """
+        return f"<ScrapedData {self.file_name} len={self.length}>"
@@ -1,11 +1,13 @@
-from typing import List, Dict, Any, Optional
-
-from anthropic import Anthropic
-from anthropic.types.message import Message
+from __future__ import annotations
+from typing import List, Dict, Any, Optional, Union, TYPE_CHECKING
 
 from app.ai.services.ModelRequest import ModelRequest
 from app.ai.services.anthropic_models import AnthropicModel
 
+if TYPE_CHECKING:
+    from anthropic import Anthropic
+    from anthropic.types.message import Message
+
 
 class AnthropicRequest(ModelRequest):
     """
@@ -16,6 +18,9 @@ class AnthropicRequest(ModelRequest):
     """
 
     ENVIRONMENT_VAR = 'ANTHROPIC_API_KEY'
+    PROMPT_CACHING_BETA = 'prompt-caching-2024-07-31'
+
+    _client: Optional[Anthropic] = None  # Shared by all requests to reuse HTTP connections
 
     def __init__(self,
         model: AnthropicModel,
@@ -26,27 +31,55 @@ class AnthropicRequest(ModelRequest):
     ) -> None:
         """ Sets the model parameters. Initializes the API client. """
         super().__init__(temperature, max_tokens, json_response, python_response)
-        self.client = Anthropic()
+        self.client = self._get_client()
         self.model = model
 
-    def _send_request(self, messages: List[Dict[str, Any]]) -> Message:
-        """ Sends the API request, prefilling the assistant's response if JSON is required. """
+    @staticmethod
+    def _get_client() -> Anthropic:
+        """ Returns the API client shared by all requests, creating it on first use. """
+        if AnthropicRequest._client is None:
+            from anthropic import Anthropic # Slow to import, only needed once a request is created
+            AnthropicRequest._client = Anthropic()
+        return AnthropicRequest._client
+
+    def _send_request(self, messages: List[Dict[str, Any]]) -> Union[Message, str]:
+        """
+        Sends the API request with a cached system prompt, prefilling the answer if JSON is required.
+        Python answers are streamed and returned as text.
+        """
+        system = [content for message in messages if message["role"] == "system" for content in message["content"]]
+        messages = [message for message in messages if message["role"] != "system"]
         if self.json_response and messages[-1]["role"] != "assistant":
             messages.append({
                 "role": "assistant",
                 "content": "JSON:\n{"  # Opening { will be missing in the answer
             })
-        return self.client.messages.create(
-            model=self.model.name,
-            temperature=self.temperature,
-            max_tokens=self.max_tokens,
-            messages=messages
-        )
+        request_params = {
+            "model": self.model.name,
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+            "messages": messages
+        }
+        if system:
+            system[-1] = {**system[-1], "cache_control": {"type": "ephemeral"}}
+            request_params["system"] = system
+            request_params["extra_headers"] = {"anthropic-beta": self.PROMPT_CACHING_BETA}
+        if self.python_response:
+            return self._stream_script(request_params)
+        return self.client.messages.create(**request_params)
+
+    def _stream_script(self, request_params: Dict[str, Any]) -> str:
+        """ Streams the answer's text, stopping as soon as the first python code block is closed. """
+        with self.client.messages.stream(**request_params) as stream:
+            return self.read_until_script_end(stream.text_stream)
 
     def get_answer(self) -> Optional[str]:
         """ Extracts the answer's text from the API response, adding the missing { if it's JSON. """
         if self.api_client_response:
-            answer = self.api_client_response.content[0].text
+            if isinstance(self.api_client_response, str): # Streamed answer
+                answer = self.api_client_response
+            else:
+                answer = self.api_client_response.content[0].text
             if self.json_response:
                 json_end = answer.rfind("}") + 1
                 answer = "{" + answer[:json_end]
@@ -1,12 +1,13 @@
+from __future__ import annotations
 import json
-from copy import deepcopy
 import traceback
-from typing import List, Dict, Any, Union
-
-import tiktoken
+from typing import List, Dict, Any, Union, TYPE_CHECKING
 
 from app.ai.services.ModelRequest import ModelRequest
 
+if TYPE_CHECKING:
+    import tiktoken
+
 
 class Conversation:
     """
@@ -14,6 +15,9 @@ class Conversation:
 
     Messages are stored in this format:
     [
+        { "role": "system", "content": [
+            { "type": "text", "text": "You are a helpful assistant" }
+        ]}
         { "role": "user", "content": [
             { "type": "text", "text": "Say ELEPHANT" }
             { "type": "image", "image": "iVBORw0KGgoAAAA..." }
@@ -25,23 +29,30 @@ class Conversation:
 
     Usage example:
         conversation = Conversation()
+        conversation.add_system("Return a JSON list")
         conversation.add_text("Cat breeds")
         conversation.add_image("base64_string")
         answer = conversation.request_answer("Validator")
     """
 
     total_cost = 0
+    _tokenizer = None  # Shared by all conversations, loading the encoding is slow
+    TOKENIZER_THREADS = 4
 
     def __init__(self, model_request: ModelRequest) -> None:
         """ Initializes: LLM Client, message list, and a bool indicating if the API failed. """
         self.model_request = model_request
         self.messages: List[Dict[str, Any]] = []
-        self.tokenizer = tiktoken.encoding_for_model('gpt-4o')
+        self._token_counts: Dict[str, int] = {}  # Token count by text, messages are resent on every request
 
     def _add_message(self, role: str, content: Dict[str, Any]) -> None:
         """ Adds a message to the list under the specified role ('user' or 'assistant'). """
         self.messages.append({"role": role, "content": [content]})
 
+    def add_system(self, text: str) -> None:
+        """ Adds a message under the 'system' role. Static instructions go here to enable prompt caching. """
+        self._add_message("system", {"type": "text", "text": str(text)})
+
     def add_text(self, text: str) -> None:
         """ Adds a text message to the list under the 'user' role. """
         self._add_message("user", {"type": "text", "text": str(text)})
@@ -53,18 +64,15 @@ class Conversation:
         else:
             self.messages[-1]["content"].append({"type": "image", "image": base64})
 
-    def replace_first_message(self, text: str) -> None:
-        """ Replaces the first conversation message with the given text. """
-        self.messages[0] = {"role": "user", "content": [{"type": "text", "text": str(text)}]}
-
     def request_answer(self) -> Union[None, Dict[str, Any], str]:
         """ Sends an API request and stores the response in messages. """
         try:
-            self._add_input_cost()
             messages = self._format_images()
             self.model_request.send(messages)
             response = self.model_request.get_answer()
-            self._add_output_cost(response)
+            if not self.model_request.cached_response: # Cached responses weren't paid for
+                self._add_input_cost()
+                self._add_output_cost(response)
             if response:
                 self._add_message("assistant", {"type": "text", "text": response})
                 return self._get_answer()
@@ -74,13 +82,17 @@ class Conversation:
             return None
 
     def _format_images(self) -> List[Dict[str, Any]]:
-        """ Formats images in messages for the current API. """
-        messages = deepcopy(self.messages)
-        for message in messages:
-            for i, content in enumerate(message["content"]):
-                if content["type"] == "image":
-                    message["content"][i] = self.model_request.format_image(content)
-        return messages
+        """ Formats images in messages for the current API. Text contents are shared, not copied. """
+        return [
+            {
+                "role": message["role"],
+                "content": [
+                    self.model_request.format_image(content) if content["type"] == "image" else content
+                    for content in message["content"]
+                ]
+            }
+            for message in self.messages
+        ]
                 
     def _get_answer(self) -> Union[Dict[str, Any], str]:
         """ Returns the LLM answer as plain text or a dictionary. """
@@ -96,23 +108,47 @@ class Conversation:
 
     def _add_input_cost(self) -> None:
         """ Adds an estimation of the cost of the messages sent to the total cost. """
-        for message in self.messages:
-            for content in message['content']:
-                if content['type'] == 'text':
-                    input_tokens = len(self.tokenizer.encode(content['text']))
-                    Conversation.total_cost += input_tokens * self.model_request.model.input_token_cost
-                elif content['type'] == 'image':
-                    Conversation.total_cost += self.model_request.model.image_cost
+        texts = [content['text'] for message in self.messages for content in message['content'] if content['type'] == 'text']
+        images = sum(content['type'] == 'image' for message in self.messages for content in message['content'])
+        self._count_new_tokens(texts)
+        input_tokens = sum(self._token_counts[text] for text in texts)
+        self._add_cost(input_tokens * self.model_request.model.input_token_cost)
+        self._add_cost(images * self.model_request.model.image_cost)
 
     def _add_output_cost(self, response: str) -> None:
         """ Adds an estimation of the cost of the message received to the total cost. """
-        output_tokens = len(self.tokenizer.encode(response))
+        output_tokens = self._count_tokens(response)
         output_cost = output_tokens * self.model_request.model.output_token_cost
-        Conversation.total_cost += output_cost
+        self._add_cost(output_cost)
+
+    def _count_tokens(self, text: str) -> int:
+        """ Returns the number of tokens in the text, tokenizing each distinct text only once. """
+        self._count_new_tokens([text])
+        return self._token_counts[text]
+
+    def _count_new_tokens(self, texts: List[str]) -> None:
+        """ Tokenizes the texts that haven't been counted yet in a single multithreaded batch. """
+        new_texts = list(dict.fromkeys(text for text in texts if text not in self._token_counts))
+        if new_texts:
+            tokens = self.tokenizer.encode_ordinary_batch(new_texts, num_threads=self.TOKENIZER_THREADS)
+            self._token_counts.update(zip(new_texts, map(len, tokens)))
+
+    @property
+    def tokenizer(self) -> tiktoken.Encoding:
+        """ Returns the tokenizer shared by all conversations, loading it on first use. """
+        if Conversation._tokenizer is None:
+            import tiktoken # Slow to import, only needed to estimate costs
+            Conversation._tokenizer = tiktoken.encoding_for_model('gpt-4o')
+        return Conversation._tokenizer
+
+    @staticmethod
+    def _add_cost(cost: float) -> None:
+        """ Adds to the total cost of all conversations. """
+        Conversation.total_cost += cost
 
     def reset(self) -> None:
-        """ Deletes messages and resets model parameters. """
-        self.messages.clear()
+        """ Deletes messages, keeping the system prompt. """
+        self.messages = [message for message in self.messages if message["role"] == "system"]
 
     def __str__(self):
         """ Shows the text messages in the conversation. """
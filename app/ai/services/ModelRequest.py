@@ -1,7 +1,6 @@
 from abc import ABC, abstractmethod
 import os
-from typing import List, Dict, Any, Optional
-import re
+from typing import List, Dict, Any, Optional, Iterable
 
 class ModelRequest(ABC):
     """
@@ -16,6 +15,8 @@ class ModelRequest(ABC):
     MAX_TOKENS = 4096
     JSON_RESPONSE = False
     PYTHON_RESPONSE = False
+    SCRIPT_START = '```python'
+    SCRIPT_END = '```'
 
     def __init__(self,
         temperature: float = TEMPERATURE,
@@ -31,10 +32,12 @@ class ModelRequest(ABC):
         self.json_response = json_response
         self.python_response = python_response
         self.api_client_response: Optional[Any] = None
+        self.cached_response = False  # True if the last response was read from the cache, so it cost nothing
 
     def send(self, messages: List[Dict[str, Any]]) -> None:
         """ Catches exceptions in the API request. """
         try:
+            self.cached_response = False
             self.api_client_response = self._send_request(messages)
         except Exception as e:
             self.api_client_response = None
@@ -56,6 +59,26 @@ class ModelRequest(ABC):
     @staticmethod
     def extract_script(answer: str) -> str:
         """ Extracts and validates the first python code block from a string. """
-        match = re.search(r'```python(.*?)```', answer, re.DOTALL)
-        script = match.group(1).strip() if match else answer
-        return script
\ No newline at end of file
+        start = answer.find(ModelRequest.SCRIPT_START)
+        if start == -1:
+            return answer
+        start += len(ModelRequest.SCRIPT_START)
+        end = answer.find(ModelRequest.SCRIPT_END, start)
+        return answer[start:end].strip() if end != -1 else answer
+
+    @staticmethod
+    def read_until_script_end(chunks: Iterable[str]) -> str:
+        """ Joins text chunks until the first python code block is closed, scanning each character once. """
+        answer = ""
+        script_start = -1
+        for chunk in chunks:
+            scanned_length = len(answer)
+            answer += chunk
+            if script_start == -1:
+                script_start = answer.find(ModelRequest.SCRIPT_START, max(0, scanned_length - len(ModelRequest.SCRIPT_START) + 1))
+                if script_start == -1:
+                    continue
+            script_end_search = max(script_start + len(ModelRequest.SCRIPT_START), scanned_length - len(ModelRequest.SCRIPT_END) + 1)
+            if answer.find(ModelRequest.SCRIPT_END, script_end_search) != -1:
+                break
+        return answer
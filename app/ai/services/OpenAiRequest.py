@@ -1,8 +1,10 @@
 from typing import List, Dict, Any, Optional
 
 from openai import OpenAI
+from openai.types.chat import ChatCompletion
 
 from app.ai.services.ModelRequest import ModelRequest
+from app.ai.services.ResponseCache import ResponseCache
 from app.ai.services.openai_models import OpenAiModel
 
 
@@ -10,12 +12,17 @@ class OpenAiRequest(ModelRequest):
     """
     Represents an OpenAI API Client request using using the specified model.
 
+    Responses at temperature 0 are cached on disk, so identical requests are only sent once (see ResponseCache).
+    Sampled answers aren't cached, retrying a request must be able to return a different answer.
+
     Requirements:
         Environment variable 'OPENAI_API_KEY'.
     """
 
     ENVIRONMENT_VAR = 'OPENAI_API_KEY'
 
+    _client: Optional[OpenAI] = None  # Shared by all requests to reuse HTTP connections
+
     def __init__(self,
         model: OpenAiModel,
         temperature: float = ModelRequest.TEMPERATURE,
@@ -23,13 +30,21 @@ class OpenAiRequest(ModelRequest):
         json_response: bool = ModelRequest.JSON_RESPONSE,
         python_response: bool = ModelRequest.PYTHON_RESPONSE
     ) -> None:
-        """ Sets the model parameters. Initializes the API client. """
+        """ Sets the model parameters. Initializes the API client and the response cache. """
         super().__init__(temperature, max_tokens, json_response, python_response)
-        self.client = OpenAI()
+        self.client = self._get_client()
         self.model = model
+        self.cache = ResponseCache()
+
+    @staticmethod
+    def _get_client() -> OpenAI:
+        """ Returns the API client shared by all requests, creating it on first use. """
+        if OpenAiRequest._client is None:
+            OpenAiRequest._client = OpenAI()
+        return OpenAiRequest._client
 
     def _send_request(self, messages: List[Dict[str, Any]]) -> Any:
-        """ Sends the API request, setting JSON mode if required. """
+        """ Sends the API request, setting JSON mode if required, or returns the cached response. """
         request_params = {
             "model": self.model.name,
             "temperature": self.temperature,
@@ -38,7 +53,16 @@ class OpenAiRequest(ModelRequest):
         }
         if self.json_response:
             request_params["response_format"] = {"type": "json_object"}
-        return self.client.chat.completions.create(**request_params)
+        if self.temperature != 0:
+            return self.client.chat.completions.create(**request_params)
+        cache_key = self.cache.get_key(request_params)
+        cached_response = self.cache.get(cache_key)
+        if cached_response:
+            self.cached_response = True
+            return ChatCompletion.model_validate_json(cached_response)
+        response = self.client.chat.completions.create(**request_params)
+        self.cache.set(cache_key, response.model_dump_json())
+        return response
 
     def get_answer(self) -> Optional[str]:
         """ Extracts the answer's text from the API response. """
@@ -49,10 +73,11 @@ class OpenAiRequest(ModelRequest):
 
     @staticmethod
     def format_image(image: Dict[str, str]):
-        """ Formats an image as URL as required by the OpenAI API. """
+        """ Formats an image as URL as required by the OpenAI API, using low detail (fixed token cost). """
         return {
           "type": "image_url",
           "image_url": {
-              "url": f"data:image/png;base64,{image["image"]}"
+              "url": f"data:image/png;base64,{image["image"]}",
+              "detail": "low"
               }
         }
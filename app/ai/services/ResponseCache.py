@@ -0,0 +1,64 @@
+import json
+import os
+import time
+from typing import Any, Dict, Optional
+
+from app.ai.utils.StringUtils import StringUtils
+
+
+class ResponseCache:
+    """
+    Exact-match disk cache of LLM API responses, keyed by a hash of the request parameters.
+
+    Usage example:
+        cache = ResponseCache()
+        key = cache.get_key({"model": "gpt-4o", "messages": messages})
+        response = cache.get(key)
+        if response is None:
+            response = send_request(messages)
+            cache.set(key, response)
+
+    Set the environment variable 'LLM_CACHE=off' to disable the cache.
+    """
+
+    ENVIRONMENT_VAR = 'LLM_CACHE'
+    DIRECTORY = '.llm_cache'
+    EXPIRATION_SECONDS = 7 * 24 * 60 * 60
+
+    def __init__(self, directory: str = DIRECTORY) -> None:
+        """ Sets the cache directory and checks if the cache is enabled. """
+        self.directory = directory
+        self.enabled = os.getenv(self.ENVIRONMENT_VAR, 'on').lower() != 'off'
+
+    @staticmethod
+    def get_key(request_params: Dict[str, Any]) -> str:
+        """ Returns a SHA-256 hash of the request parameters (model, settings and messages). """
+        return StringUtils.get_hash(json.dumps(request_params, sort_keys=True))
+
+    def _get_path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}.json')
+
+    def get(self, key: str) -> Optional[str]:
+        """ Returns the cached response, or None if it's missing, expired or the cache is disabled. """
+        if not self.enabled:
+            return None
+        path = self._get_path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.EXPIRATION_SECONDS:
+                os.remove(path)
+                return None
+            with open(path, 'r', encoding='utf-8') as file:
+                return file.read()
+        except OSError:
+            return None
+
+    def set(self, key: str, response: str) -> None:
+        """ Stores the response in the cache. """
+        if not self.enabled:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self._get_path(key), 'w', encoding='utf-8') as file:
+                file.write(response)
+        except OSError as e:
+            print(f"LLM cache error: {str(e)}")
@@ -7,7 +7,7 @@ class Gpt4o(OpenAiModel):
     name = 'gpt-4o'
     input_token_cost =  0.000005
     output_token_cost = 0.000015
-    image_cost =        0.0055
+    image_cost =        0.000425
 
 class Gpt4oMini(OpenAiModel):
     name = 'gpt-4o-mini'
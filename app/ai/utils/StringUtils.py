@@ -1,6 +1,12 @@
+import hashlib
+import re
+
+
 class StringUtils:
     """ Utility class for string operations. """
 
+    WHITESPACE = re.compile(r'\s+')
+
     @staticmethod
     def trim_with_ellipsis(text: str, max_length: int) -> str:
         """ Trims the text to the maximum length and adds an ellipsis if it's longer. """
@@ -15,3 +21,13 @@ class StringUtils:
             return text
         half_limit = max_length // 2
         return text[:half_limit] + "..." + text[-half_limit:]
+
+    @staticmethod
+    def collapse_whitespace(text: str) -> str:
+        """ Replaces each run of whitespace with a single space. """
+        return StringUtils.WHITESPACE.sub(' ', text).strip()
+
+    @staticmethod
+    def get_hash(text: str) -> str:
+        """ Returns a SHA-256 hash of the text, used as a cache key. """
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
@@ -1,17 +1,18 @@
-import email
-import json
+import base64
+import quopri
+import re
 import time
-import requests
-from typing import List, Optional, Dict
-from requests.exceptions import RequestException
+from typing import List, Optional
 
 from selenium import webdriver
 from selenium.common.exceptions import StaleElementReferenceException
 from selenium.common.exceptions import ElementNotInteractableException
+from selenium.common.exceptions import JavascriptException, TimeoutException, WebDriverException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.webdriver import WebDriver
+from selenium.webdriver.support.wait import WebDriverWait
 from webdriver_manager.chrome import ChromeDriverManager
 
 from app.navigation.Document import Document
@@ -23,7 +24,7 @@ class Browser:
     Controls the Chrome browser and extracts content from websites. 
 
     Usage example:
-        browser = Browser()
+        browser = Browser()  # Browser(headless=True, load_images=False) when no user interaction is needed
         browser.go_to_url('https://www.example.com')
         was_element_clicked = browser.click_element(By.ID, 'some_id')
         base64_string = browser.take_screenshot_as_base64()
@@ -37,50 +38,98 @@ class Browser:
 
     SELECTOR_TYPES = {'id': By.ID, 'class': By.CLASS_NAME, 'xpath': By.XPATH}
 
-    LOADING_TIME = 3
-
-    def __init__(self) -> None:
-        """ Initializes the Browser's driver and an empty Document."""
-        self._driver: WebDriver = self._setup_chrome_driver()
+    MHT_BOUNDARY = re.compile(r'boundary="?([^";\r\n]+)"?', re.IGNORECASE)
+    MHT_HEADERS_END = re.compile(r'\r?\n\r?\n')
+    MHT_HTML_PART = re.compile(r'^Content-Type:\s*text/html\b', re.IGNORECASE | re.MULTILINE)
+    MHT_TRANSFER_ENCODING = re.compile(r'^Content-Transfer-Encoding:\s*([\w-]+)', re.IGNORECASE | re.MULTILINE)
+
+    _driver_path: Optional[str] = None  # Installed once, ChromeDriverManager checks the latest version online
+
+    LOADING_TIME = 3  # Max seconds to wait for a page to load
+    POLL_INTERVAL = 0.2  # Seconds between page state checks
+    SCROLL_QUIET_TIME = 1.5  # Seconds the page must stay unchanged after scrolling, lazy content loads with a delay
+    READY_STATES = ('interactive', 'complete')  # The DOM is parsed, images and iframes may still be loading
+    # The page has settled when it's parsed and its height and number of elements stop changing
+    PAGE_STATE_SCRIPT = (
+        "return [document.readyState, document.body ? document.body.scrollHeight : 0, "
+        "document.getElementsByTagName('*').length]"
+    )
+
+    def __init__(self, headless: bool = False, load_images: bool = True) -> None:
+        """
+        Initializes the Browser's driver and an empty Document.
+        The window is visible by default so the user can close popups and solve captchas.
+        """
+        self._driver: WebDriver = self._setup_chrome_driver(headless, load_images)
+        self._wait = WebDriverWait(
+            self._driver, self.LOADING_TIME, poll_frequency=self.POLL_INTERVAL, ignored_exceptions=[JavascriptException]
+        )
         self.document: Document = None
     
-    def _setup_chrome_driver(self) -> WebDriver:
+    def _setup_chrome_driver(self, headless: bool, load_images: bool) -> WebDriver:
         """ Installs, initializes and returns the Chrome driver. """
-        service = Service(ChromeDriverManager().install())
+        if Browser._driver_path is None:
+            Browser._driver_path = ChromeDriverManager().install()
+        service = Service(Browser._driver_path)
         options = webdriver.ChromeOptions()
         options.add_experimental_option("prefs", {"translate": {"enabled": False}})
         options.add_argument('--disable-translate')
+        options.add_argument('--disable-dev-shm-usage')
+        options.page_load_strategy = 'eager' # Don't wait for images and iframes, _wait_for_page waits for the content
+        if headless:
+            options.add_argument('--headless=new')
+            options.add_argument('--disable-gpu')
+        if not load_images:
+            options.add_argument('--blink-settings=imagesEnabled=false')
         driver = webdriver.Chrome(service=service, options=options)
         return driver
     
     def go_to_url(self, url: str) -> None:
         """ Go to the URL and wait for the page to load. """
         self._driver.get(url)
-        time.sleep(self.LOADING_TIME)
+        self._wait_for_page()
         self.document = Document(self.get_main_html())
 
+    def _wait_for_page(self, quiet_time: float = 0) -> None:
+        """
+        Waits until the page has settled, for at most LOADING_TIME seconds.
+        The page state must be the same in two polls at least quiet_time seconds apart.
+        """
+        unchanged = {'state': None, 'since': 0.0}
+        def page_settled(driver: WebDriver) -> bool:
+            state, now = driver.execute_script(self.PAGE_STATE_SCRIPT), time.monotonic()
+            if state != unchanged['state']:
+                unchanged['state'], unchanged['since'] = state, now
+                return False
+            return state[0] in self.READY_STATES and now - unchanged['since'] >= quiet_time
+        try:
+            self._wait.until(page_settled)
+        except TimeoutException:
+            pass # Pages that keep changing are used as they are after LOADING_TIME
+
     def take_screenshot_as_base64(self) -> str:
         """ Screenshots of the current page as a base64 string. """
         png = self._driver.get_screenshot_as_png()
         return Screenshot(png).as_base64()
 
     def click_element(self, selector_type: str, selector: str) -> bool:
-        """ Clicks page elements based on the given selector. """
-        if selector_type not in self.SELECTOR_TYPES:
-            return
-        selector_type = self.SELECTOR_TYPES[selector_type]
-        elements = self._find_and_click_elements(selector_type, selector)
+        """ Clicks page elements based on the given selector, looking inside iframes if none are found. """
+        by = self.SELECTOR_TYPES.get(selector_type)
+        if by is None:
+            return False
+        elements = self._find_and_click_elements(by, selector)
         if not elements:
             for iframe in self._driver.find_elements(By.TAG_NAME, 'iframe'):
                 self._driver.switch_to.frame(iframe)
-                elements = self._find_and_click_elements(selector_type, selector)
+                elements.extend(self._find_and_click_elements(by, selector))
                 self._driver.switch_to.default_content()
-        time.sleep(self.LOADING_TIME)
+        self._wait_for_page()
         self.document.update(self.get_main_html())
         return bool(elements)
 
-    def _find_and_click_elements(self, selector_type: str, selector: str) -> List:
-        elements = self._driver.find_elements(self.SELECTOR_TYPES[selector_type], selector)
+    def _find_and_click_elements(self, by: str, selector: str) -> List:
+        """ Clicks the elements found with the given By strategy in the current frame. """
+        elements = self._driver.find_elements(by, selector)
         for element in elements:
             try:
                 element.click()
@@ -88,42 +137,44 @@ class Browser:
                 continue
         return elements
 
-    def _post_request(self, url: str, body: str) -> Optional[Dict]:
-        """ Sends a POST request to the URL and returns the response. """
-        try:
-            headers = {'Content-Type': 'application/json'}
-            return requests.post(url, body, headers=headers, timeout=self.LOADING_TIME)
-        except RequestException as error:
-            return None
-
     def _take_page_snapshot(self) -> Optional[str]:
         """ Get the current page as an MHT string. """
         self._scoll_to_bottom()
-        resource = f"/session/{self._driver.session_id}/chromium/send_command_and_get_result"
-        url = self._driver.command_executor._url + resource
-        body = json.dumps({'cmd': 'Page.captureSnapshot', 'params': {}})
-        response = self._post_request(url, body)
-        if response:
-            return response.json().get('value').get('data')
-        else:
+        try:
+            return self._driver.execute_cdp_cmd('Page.captureSnapshot', {}).get('data')
+        except WebDriverException:
             return None
 
     def _scoll_to_bottom(self) -> None:
         """ Scrolls to the bottom of the page to load all content. """
         body = self._driver.find_element(By.TAG_NAME, 'body')
         body.send_keys(Keys.END)
-        time.sleep(self.LOADING_TIME)
+        self._wait_for_page(self.SCROLL_QUIET_TIME)
         body.send_keys(Keys.HOME)
 
     def _extract_embedded_docs(self, mht: Optional[str]) -> List[str]:
-        """ Extracts all HTML documents from an MHT string. """
+        """ Extracts all HTML documents from an MHT string, splitting it on the MIME boundary. """
         if mht is None:
             return []
-        message = email.message_from_string(mht)
+        boundary = self.MHT_BOUNDARY.search(mht)
+        if not boundary:
+            return []
         html_documents = []
-        for part in message.walk():
-            if part.get_content_type() == 'text/html':
-                html_documents.append(part.get_payload(decode=True).decode('utf-8'))
+        for part in mht.split('--' + boundary.group(1))[1:]:
+            headers_and_body = self.MHT_HEADERS_END.split(part, maxsplit=1)
+            if len(headers_and_body) < 2:
+                continue
+            headers, body = headers_and_body
+            if not self.MHT_HTML_PART.search(headers):
+                continue
+            encoding = self.MHT_TRANSFER_ENCODING.search(headers)
+            encoding = encoding.group(1).lower() if encoding else ''
+            if encoding == 'quoted-printable':
+                html_documents.append(quopri.decodestring(body.encode('utf-8')).decode('utf-8', errors='replace'))
+            elif encoding == 'base64':
+                html_documents.append(base64.b64decode(body).decode('utf-8', errors='replace'))
+            else:
+                html_documents.append(body)
         return html_documents
 
     def get_main_html(self) -> List[str]:
@@ -139,7 +190,7 @@ class Browser:
     def reload_page(self) -> None:
         """ Reloads the current page and updates the document. """
         self._driver.refresh()
-        time.sleep(self.LOADING_TIME)
+        self._wait_for_page()
         self.document.update(self.get_main_html())
 
     def get_url(self) -> str:
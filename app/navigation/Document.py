@@ -1,5 +1,7 @@
-from bs4 import Comment, NavigableString
-from typing import List, Optional
+import itertools
+import re
+from bs4 import Comment, NavigableString, SoupStrainer
+from typing import List, Optional, Dict, Iterable, Iterator
 
 from app.navigation.ExtendedBeautifulSoup import ExtendedBeautifulSoup as BS
 from app.navigation.ExtendedTag import ExtendedTag as Tag
@@ -12,103 +14,120 @@ class Document:
         document = Document(html_list)
         document_text = document.get_text(100)
         elements = document.find_elements_by_text('example')
-        common_ancestor = document.find_common_ancestor(elements[0], elements[1])
+        elements_by_text = document.find_elements_by_texts(['example', 'other example'])
         ancestors = document.find_ancestors(elements[0], elements[0].parent.parent)
         family = document.get_family(elements[0])
         distinct_children = document.find_distinct_children(elements[0])
         document.update(new_html_list)
+        version = document.version
     """
 
+    _versions = itertools.count(1)  # Shared by all documents, so a version identifies a single update
+    PARSER = BS.DEFAULT_FEATURES
+    BODY_ONLY = SoupStrainer('body')  # The head is never used, so it isn't added to the tree
+    BODY_START = re.compile(r'<body[^>]*>', re.IGNORECASE)
+    BODY_END = re.compile(r'</body\s*>', re.IGNORECASE)
+    SKIPPED_TAGS = {'script', 'style'}  # Their strings aren't part of the page text
+
     def __init__(self, html_list: List[str]) -> None:
         """ Initializes the Document with an empty body and immediately updates it. """
         self.html: Optional[BS] = None
         self.body: Optional[Tag] = None
+        self._texts: Dict[int, str] = {}  # get_text results by max_length
+        self._html_list: List[str] = []  # HTML of the last update
+        self.version = 0
         self.update(html_list)
 
     def update(self, html_list: List[str]) -> None:
-        """ Refresh the HTML body contents. """
+        """
+        Refresh the HTML body contents and increase the version.
+        If the HTML hasn't changed (after a click that did nothing, or a reload) it isn't parsed again.
+        """
+        if self.html is not None and html_list == self._html_list:
+            return
+        self._html_list = list(html_list)
         self.html = self._combine_documents(html_list)
         self.body = self.html.body
+        self._texts = {}  # Replaced after the body so texts from the old body can't be cached
+        self.version = next(Document._versions)
 
     def _combine_documents(self, html_list: List[str]) -> BS:
-        """ Adds the body contents of multiple html documents to a main document. """
-        main_soup = BS(html_list[0], 'html.parser')
-        for html in html_list[1:]:
-            secondary_soup = BS(html, 'html.parser')
-            body = secondary_soup.body
-            if not body:
-                continue
-            for child in body.children:
-                if isinstance(child, Tag):
-                    main_soup.body.append(self._copy_tag(child, main_soup))
-                else:
-                    main_soup.body.append(main_soup.new_string(str(child)))
-        return main_soup
-
-    def _copy_tag(self, src_tag: Tag, dest_soup: BS) -> Tag:
-        """ Recursively copy a tag and its content. """
-        attributes_except_name = {k: v for k, v in src_tag.attrs.items() if k != 'name'}
-        new_tag = dest_soup.new_tag(src_tag.name, **attributes_except_name)
-        for child in src_tag.children:
-            if isinstance(child, Tag):
-                new_tag.append(self._copy_tag(child, dest_soup))
-            else:
-                new_tag.append(dest_soup.new_string(str(child)))
-        return new_tag
+        """ Adds the body contents of multiple html documents to a main document, parsing the result once. """
+        main_html = html_list[0]
+        secondary_bodies = [self._get_body_contents(html) for html in html_list[1:]]
+        body_end = self._find_body_end(main_html)
+        combined_html = ''.join([main_html[:body_end], *secondary_bodies, main_html[body_end:]])
+        return BS(combined_html, self.PARSER, parse_only=self.BODY_ONLY)
+
+    def _get_body_contents(self, html: str) -> str:
+        """ Returns the html between the body tags, or an empty string if there's no body. """
+        body_start = self.BODY_START.search(html)
+        if not body_start:
+            return ''
+        return html[body_start.end():self._find_body_end(html)]
+
+    def _find_body_end(self, html: str) -> int:
+        """ Returns the position of the last closing body tag, in any case, or the length of the html if there's none. """
+        body_end = len(html)
+        for match in self.BODY_END.finditer(html):
+            body_end = match.start()
+        return body_end
 
     def get_text(self, max_length: int) -> str:
-        """ Returns strings in HTML elements, shortening long ones. """
+        """ Returns strings in HTML elements, shortening long ones. The result is cached until the next update. """
+        texts_cache = self._texts
+        if max_length in texts_cache:
+            return texts_cache[max_length]
         if not self.body:
             return ''
-        body_copy = self.body.copy()
-        clean_body = body_copy.remove_tags(['script', 'style'])
-        texts = self._extract_element_texts(clean_body)
-        short_texts = []
-        for text in texts:
-            if len(text) > max_length:
-                short_texts.append(text[:max_length] + '...')
-            else:
-                short_texts.append(text)
-        return self._join_strings(short_texts)
-
-    def _extract_element_texts(self, element: Tag) -> List[str]:
-        """ Extracts strings from HTML elements. """
-        texts = []
-        for child in element.children:
-            if isinstance(child, Comment):
+        texts = self._extract_element_texts(self.body, max_length)
+        text = self._join_strings(texts)
+        texts_cache[max_length] = text
+        return text
+
+    def _extract_element_texts(self, element: Tag, max_length: int) -> Iterator[str]:
+        """ Yields strings from HTML elements in document order, shortening long ones. Skips scripts and styles. """
+        stack = list(reversed(element.contents))
+        while stack:
+            node = stack.pop()
+            if isinstance(node, Comment):
                 continue
-            elif isinstance(child, NavigableString):
-                texts.append(child.string.strip())
-            else:
-                texts.extend(self._extract_element_texts(child))
-        return texts
+            elif isinstance(node, NavigableString):
+                text = node.strip()
+                yield text[:max_length] + '...' if len(text) > max_length else text
+            elif node.name not in self.SKIPPED_TAGS:
+                stack.extend(reversed(node.contents))
 
-    def _join_strings(self, strings: List) -> str:
+    def _join_strings(self, strings: Iterable[str]) -> str:
         """ Joins a list of strings without unnecessary whitespace. """
         return ' '.join(' '.join(strings).split())
 
     def find_elements_by_text(self, text: str) -> List[Tag]:
         """ Finds all HTML elements that contain a given string. """
-        elements = self.body.find_all(lambda tag: self._tag_contains_text(tag, text))
+        return self.find_elements_by_texts([text])[text]
+
+    def find_elements_by_texts(self, texts: Iterable[str]) -> Dict[str, List[Tag]]:
+        """ Finds the HTML elements that contain each of the given strings, searching the body strings once. """
+        elements = {text: [] for text in texts}
+        for string in self.body.find_all(string=lambda string: string.strip() in elements):
+            elements[string.strip()].extend(self._get_string_containers(string))
         return elements
-    
-    def _tag_contains_text(self, tag: Tag, text: str) -> bool:
-        return tag.string and tag.string.strip() == text
-
-    def find_common_ancestor(self, element1: Tag, element2: Tag) -> Optional[Tag]:
-        """ Finds the closest common ancestor of two HTML elements. """
-        ancestors1 = list(element1.parents)
-        ancestors2 = list(element2.parents)
-        for ancestor1 in ancestors1:
-            if ancestor1 in ancestors2:
-                return ancestor1
-        return None
+
+    def _get_string_containers(self, string: NavigableString) -> List[Tag]:
+        """ Returns the tags inside the body whose only content is the string, outermost first. """
+        containers = []
+        tag = string.parent
+        while tag is not self.body and len(tag.contents) == 1:
+            containers.append(tag)
+            tag = tag.parent
+        containers.reverse()
+        return containers
 
     def find_ancestors(self, element: Tag, ancestor_limit: Tag) -> List[Tag]:
         """ Returns the ancestors of an HTML element up to the given ancestor. """
         ancestors = [element]
         current_element = element.parent
-        while current_element != ancestor_limit:
+        while current_element is not ancestor_limit and current_element is not None: # Tag != compares contents
             ancestors.append(current_element)
             current_element = current_element.parent
         ancestors.reverse()
@@ -118,16 +137,20 @@ class Document:
         """ Returns the parent and siblings of the HTML element (without the element). """
         if element.name == 'body':
             return None
+        position = sum(1 for sibling in element.previous_siblings if isinstance(sibling, Tag))
         parent = element.parent.copy()
-        parent.find(element.name, attrs=element.attrs).decompose()
+        parent.find_all(recursive=False)[position].decompose() # The copy has the same child tags, in order
         return parent
     
     def find_distinct_children(self, element: Tag) -> List[Tag]:
         """ Returns the children of the HTML element that are not similar. """
         distinct_children = []
+        seen_keys = set()
         for child in element.children:
             if not isinstance(child, Tag):
                 continue
-            if not any(child.is_identical_to(distinct) for distinct in distinct_children):
+            key = child.similarity_key()
+            if key not in seen_keys:
+                seen_keys.add(key)
                 distinct_children.append(child)
         return distinct_children
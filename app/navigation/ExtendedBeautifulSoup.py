@@ -1,18 +1,15 @@
-from bs4 import BeautifulSoup
-from typing import Any
+from bs4 import BeautifulSoup, Tag
+from bs4.builder import builder_registry
+from typing import Any, Optional
 
 from app.navigation.ExtendedTag import ExtendedTag
 
 class ExtendedBeautifulSoup(BeautifulSoup):
 
-    def __init__(self, *args: Any, **kwargs: Any) -> None:
-        """ Turn tags into ExtendedTags when creating a BeautifulSoup object. """
-        super().__init__(*args, **kwargs)
-        for tag in self.find_all():
-            tag.__class__ = ExtendedTag
+    # lxml is a C parser, several times faster than 'html.parser' which is only used if lxml isn't installed
+    DEFAULT_FEATURES = 'lxml' if builder_registry.lookup('lxml') else 'html.parser'
 
-    def new_tag(self, name, *args, **kwargs):
-        """ Turn newly created tags into ExtendedTags. """
-        tag = super().new_tag(name, *args, **kwargs)
-        tag.__class__ = ExtendedTag
-        return tag
\ No newline at end of file
+    def __init__(self, markup: Any = "", features: Optional[str] = DEFAULT_FEATURES, *args: Any, **kwargs: Any) -> None:
+        """ Creates tags (parsed or with new_tag) as ExtendedTags. Parses with lxml if available. """
+        kwargs.setdefault('element_classes', {Tag: ExtendedTag})
+        super().__init__(markup, features, *args, **kwargs)
@@ -1,10 +1,11 @@
 from __future__ import annotations
 from copy import deepcopy
-from typing import List, Optional
+from itertools import islice
+from typing import List, Optional, Tuple, Iterable
 
-from bs4 import Tag
-from htmlmin import minify
+from bs4 import BeautifulSoup, Tag
 from bs4 import Comment
+from bs4.builder import builder_registry
 
 from app.ai.utils.StringUtils import StringUtils
 
@@ -14,6 +15,10 @@ class ExtendedTag(Tag):
 
     name: str
 
+    TEXT_TAGS = frozenset(['p', 'ul', 'ol', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
+    COPY_PARSER = 'lxml' if builder_registry.lookup('lxml') else None  # Without lxml tags are copied with deepcopy
+    COPY_REPARSE_MIN_NODES = 80  # Smaller tags are copied faster with deepcopy than by starting a parser
+
     def __init__(
         self, parser=None, builder=None, name=None, namespace=None,
         prefix=None, attrs=None, parent=None, previous=None,
@@ -37,13 +42,22 @@ class ExtendedTag(Tag):
         """ True if two tags have the same name and attributes, ignoring the id. """
         if self.name != other.name:
             return False
-        self_attrs = {k: v for k, v in self.attrs.items() if k != 'id'}
-        other_attrs = {k: v for k, v in other.attrs.items() if k != 'id'}
-        return self_attrs == other_attrs
+        attrs, other_attrs = self.attrs, other.attrs
+        # Same number of attributes besides the id, so other has no attribute missing from self
+        if len(attrs) - ('id' in attrs) != len(other_attrs) - ('id' in other_attrs):
+            return False
+        return all(k == 'id' or (k in other_attrs and other_attrs[k] == v) for k, v in attrs.items())
+
+    def similarity_key(self, ignore: Iterable[str] = ('id',)) -> Tuple:
+        """ Hashable name and attributes of the tag, equal for identical tags (see is_identical_to). """
+        attrs = tuple(sorted(
+            (k, tuple(v) if isinstance(v, list) else v) for k, v in self.attrs.items() if k not in ignore
+        ))
+        return (self.name, attrs)
 
     def is_text_tag(self) -> bool:
         """ True if the tag is a paragraph, header or list. """
-        return self.name in ['p', 'ul', 'ol', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6']
+        return self.name in self.TEXT_TAGS
     
     def remove_children_style(self) -> ExtendedTag:
         """ Removes the style attribute from all direct children of the tag. """
@@ -73,20 +87,32 @@ class ExtendedTag(Tag):
         return table_copy
 
     def copy(self) -> ExtendedTag:
-        """ Returns a deep copy of the tag. """
+        """
+        Returns a deep copy of the tag, detached from the tree.
+        Re-parsing the HTML of large tags is faster than copying node by node. deepcopy is used for small tags,
+        without lxml, for tags not created by a parser (their attribute values could differ) and for tags the parser
+        would change (a lone <tr>).
+        """
+        if self.parser_class is None or not self.COPY_PARSER:
+            return deepcopy(self)
+        if next(islice(self.descendants, self.COPY_REPARSE_MIN_NODES, None), None) is None:
+            return deepcopy(self)
+        body = BeautifulSoup(str(self), self.COPY_PARSER, element_classes={Tag: ExtendedTag}).body
+        if body and len(body.contents) == 1 and body.contents[0].name == self.name:
+            return body.contents[0].extract()
         return deepcopy(self)
 
     def shorten_text(self, nchars: int) -> ExtendedTag:
-        """ Shortens all strings in the HTML. """
-        for element in self.find_all():
-            if element.string and len(element.string) > nchars:
-                element.string = element.string[:nchars] + '...'
+        """ Shortens the strings of all elements that only contain text, replacing each string node once. """
+        for string in self.find_all(string=True):
+            if len(string) > nchars and len(string.parent.contents) == 1 and not isinstance(string, Comment):
+                string.replace_with(string[:nchars] + '...')
         return self
     
     def remove_tags(self, tags: List[str]) -> ExtendedTag:
         """ Removes all the given tags from the element. """
-        for tag in tags:
-            for element in self.find_all(tag):
+        for element in self.find_all(tags):
+            if not element.decomposed: # Tags nested in a removed tag are already gone
                 element.decompose()
         return self
 
@@ -118,6 +144,33 @@ class ExtendedTag(Tag):
                     child.decompose()
         return self
 
+    def clean(self, remove_tags: List[str], strip: List[str], max_text: int, max_src: int) -> ExtendedTag:
+        """
+        Shortens texts and src attributes, removes comments and tags, clears svg contents and strips attributes.
+        Same result as calling each method, but the tree is traversed once.
+        """
+        remove_tags, strip = frozenset(remove_tags), frozenset(strip)
+        for element in list(self.descendants):
+            if element.decomposed or element.parent is None: # Removed with an ancestor earlier in the loop
+                continue
+            elif isinstance(element, Comment):
+                element.extract()
+            elif not isinstance(element, Tag):
+                if len(element) > max_text and len(element.parent.contents) == 1:
+                    element.replace_with(element[:max_text] + '...')
+            elif element.name in remove_tags:
+                element.decompose()
+            else:
+                if element.name == 'svg':
+                    for child in element.find_all(recursive=False):
+                        child.decompose()
+                attrs = element.attrs
+                for attr in [attr for attr in attrs if attr in strip]: # Elements have fewer attributes than strip
+                    del attrs[attr]
+                if 'src' in element.attrs:
+                    element['src'] = StringUtils.trim_with_ellipsis(element['src'], max_src)
+        return self
+
     def minify(self) -> str:
         """ Removes unnecessary whitespace from the HTML. """
-        return minify(str(self))
+        return StringUtils.collapse_whitespace(str(self))
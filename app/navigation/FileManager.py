@@ -1,10 +1,15 @@
 import os
 import platform
 import subprocess
+from concurrent.futures import ThreadPoolExecutor, Future, wait
+from typing import List
 
 class FileManager:
     """ Utility class to interact with files. """
 
+    _executor = ThreadPoolExecutor(max_workers=4)
+    _pending_deletions: List[Future] = []
+
     @staticmethod
     def open_file(file_name):
         current_os = platform.system()
@@ -22,8 +27,24 @@ class FileManager:
         
     @staticmethod
     def delete_files_by_extension(extension):
-        current_dir = os.getcwd()
-        for file in os.listdir(current_dir):
-            if file.endswith(extension):
-                file_path = os.path.join(current_dir, file)
-                os.remove(file_path)
\ No newline at end of file
+        """ Deletes the files in the working directory in the background, see wait_for_deletions. """
+        with os.scandir(os.getcwd()) as entries:
+            # The name is checked first, is_file may need a stat call
+            file_paths = [entry.path for entry in entries if entry.name.endswith(extension) and entry.is_file()]
+        if file_paths:
+            FileManager._pending_deletions.append(FileManager._executor.submit(FileManager._delete_files, file_paths))
+
+    @staticmethod
+    def _delete_files(file_paths):
+        """ Deletes the files in a single background task. """
+        for file_path in file_paths:
+            try:
+                os.unlink(file_path)
+            except FileNotFoundError:
+                pass
+
+    @staticmethod
+    def wait_for_deletions():
+        """ Blocks until all the files scheduled for deletion have been deleted. """
+        wait(FileManager._pending_deletions)
+        FileManager._pending_deletions.clear()
@@ -0,0 +1,103 @@
+from __future__ import annotations
+from typing import List, TYPE_CHECKING
+
+from lxml import etree
+from lxml.html import HtmlElement, fragment_fromstring, tostring
+
+from app.ai.utils.StringUtils import StringUtils
+
+if TYPE_CHECKING:
+    from bs4 import Tag
+
+
+class LxmlTag:
+    """
+    HTML cleaning methods of ExtendedTag backed by lxml, which parses and traverses the tree in C.
+
+    Usage example:
+        html = LxmlTag.from_tag(tag).remove_tags(['script']).minify()
+    """
+
+    def __init__(self, html: str) -> None:
+        """ Parses the HTML inside a wrapper element, so fragments with several root elements are kept. """
+        self.root: HtmlElement = fragment_fromstring(html, create_parent='div')
+
+    @classmethod
+    def from_tag(cls, tag: Tag) -> LxmlTag:
+        """ Parses a BeautifulSoup tag. """
+        return cls(str(tag))
+
+    def shorten_text(self, nchars: int) -> LxmlTag:
+        """ Shortens the strings of all elements that only contain text. """
+        for element in self.root.iterdescendants(etree.Element):
+            if len(element) == 0 and element.text and len(element.text) > nchars:
+                element.text = element.text[:nchars] + '...'
+        return self
+
+    def remove_tags(self, tags: List[str]) -> LxmlTag:
+        """ Removes all the given tags from the element. """
+        for element in list(self.root.iterdescendants(*tags)):
+            element.drop_tree()
+        return self
+
+    def strip_attributes(self, strip: List[str]) -> LxmlTag:
+        """ Strips the specified attributes from all elements. """
+        for element in self.root.iterdescendants(etree.Element):
+            for attr in strip:
+                element.attrib.pop(attr, None)
+        return self
+
+    def remove_comments(self) -> LxmlTag:
+        """ Removes all HTML comments from the element. """
+        for comment in list(self.root.iterdescendants(etree.Comment)):
+            comment.drop_tree()
+        return self
+
+    def shorten_src(self, max_length: int) -> LxmlTag:
+        """ Shortens all src attribute values to a maximum length. """
+        for element in self.root.iterdescendants(etree.Element):
+            if 'src' in element.attrib:
+                element.attrib['src'] = StringUtils.trim_with_ellipsis(element.attrib['src'], max_length)
+        return self
+
+    def clear_svg_contents(self) -> LxmlTag:
+        """ Delete all children from svg tags inside the current tag. """
+        for svg in self.root.iterdescendants('svg'):
+            for child in list(svg):
+                child.drop_tree()
+        return self
+
+    def clean(self, remove_tags: List[str], strip: List[str], max_text: int, max_src: int) -> LxmlTag:
+        """
+        Shortens texts and src attributes, removes comments and tags, clears svg contents and strips attributes.
+        Same result as calling each method, but the tree is traversed once.
+        """
+        remove_tags, strip = frozenset(remove_tags), frozenset(strip)
+        for element in list(self.root.iterdescendants()):
+            if element.tag is etree.Comment:
+                element.drop_tree()
+            elif not isinstance(element.tag, str):
+                continue
+            elif element.tag in remove_tags:
+                element.drop_tree()
+            else:
+                if len(element) == 0 and element.text and len(element.text) > max_text:
+                    element.text = element.text[:max_text] + '...'
+                if element.tag == 'svg':
+                    for child in list(element):
+                        child.drop_tree()
+                attrib = element.attrib
+                for attr in [attr for attr in attrib if attr in strip]: # Elements have fewer attributes than strip
+                    del attrib[attr]
+                if 'src' in element.attrib:
+                    element.attrib['src'] = StringUtils.trim_with_ellipsis(element.attrib['src'], max_src)
+        return self
+
+    def minify(self) -> str:
+        """ Removes unnecessary whitespace from the HTML. """
+        return StringUtils.collapse_whitespace(str(self))
+
+    def __str__(self) -> str:
+        """ Serializes the contents of the wrapper element. """
+        children = (tostring(child, encoding='unicode') for child in self.root)
+        return (self.root.text or '') + ''.join(children)
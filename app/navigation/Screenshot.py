@@ -1,30 +1,37 @@
 import base64
 from PIL import Image
 import io
-from typing import Union
+from typing import Optional
 
 
 class Screenshot:
     """ Represents an image, with methods to manipulate it. """
 
-    max_height = 1200
+    max_width = 1024
+    max_height = 1024
+    PNG_COMPRESS_LEVEL = 1  # Fast zlib level for resized images, the default (6) is several times slower
+    RESAMPLING = Image.Resampling.BICUBIC  # Faster than LANCZOS, the text stays just as readable
+    REDUCING_GAP = 2.0  # Large images are first reduced by an integer factor with a fast box filter
 
     def __init__(self, png: bytes) -> None:
-        """ Initialize the image from raw PNG data. """
+        """ Initialize the image from raw PNG data. Opening the image only reads its header. """
+        self._png: Optional[bytes] = png  # Returned as is if the image isn't modified
         self.image: Image = Image.open(io.BytesIO(png))
-        if self.image.height > self.max_height:
+        if self.image.width > self.max_width or self.image.height > self.max_height:
             self.reduce_image_size()
 
     def reduce_image_size(self) -> None:
-        """ Halve the image if larger than the maximum height. """
-        new_width = self.image.width // 2
-        new_height = self.image.height // 2
-        self.image = self.image.resize((new_width, new_height), Image.Resampling.LANCZOS)
+        """ Downscale the image to fit the maximum size, keeping the aspect ratio. """
+        image_format = self.image.format
+        self.image.thumbnail((self.max_width, self.max_height), self.RESAMPLING, reducing_gap=self.REDUCING_GAP)
+        self.image.format = image_format
+        self._png = None
 
     def as_base64(self) -> str:
-        """ Returns the image as a base64 string. """
-        buffered = io.BytesIO()
-        self.image.save(buffered, format='PNG')
-        img_str = base64.b64encode(buffered.getvalue())
-        return img_str.decode('ascii')
+        """ Returns the image as a base64 string, encoding it as PNG only if it was resized. """
+        if self._png is None:
+            buffered = io.BytesIO()
+            self.image.save(buffered, format='PNG', compress_level=self.PNG_COMPRESS_LEVEL)
+            self._png = buffered.getvalue()
+        return base64.b64encode(self._png).decode('ascii')
     
\ No newline at end of file
@@ -1,10 +1,12 @@
+import itertools
 import os
-import sys
-import time
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional
 
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
 from requests.exceptions import RequestException
+from urllib3.util.retry import Retry
 
 
 class Search:
@@ -28,6 +30,8 @@ class Search:
     TIMEOUT = 10
     REQUEST_TRIES = 3
     SECONDS_BETWEEN_RETRIES = 5
+    RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+    _shared_session: Optional[requests.Session] = None  # Shared by all searches to reuse the API connection
 
     def __init__(self) -> None:
         self._request_parameters = {
@@ -37,9 +41,29 @@ class Search:
             'start': 1 # Index for pagination
         }
         self._total_results = 0
+        self._session = self._get_session()
+
+    @staticmethod
+    def _get_session() -> requests.Session:
+        """
+        Returns the session shared by all searches, creating it on first use.
+        It keeps the connection alive between pages and queries, and retries failed requests.
+        """
+        if Search._shared_session is None:
+            retry = Retry(
+                total=Search.REQUEST_TRIES - 1,
+                backoff_factor=Search.SECONDS_BETWEEN_RETRIES,
+                status_forcelist=Search.RETRY_STATUS_CODES
+            )
+            session = requests.Session()
+            session.mount('https://', HTTPAdapter(max_retries=retry))
+            Search._shared_session = session
+        return Search._shared_session
 
     def set_query(self, query: str) -> None:
-        """ Sets the search query. """
+        """ Sets the search query. The credentials are checked here, once per search, instead of per request. """
+        if not self.API_KEY or not self.API_ID:
+            raise EnvironmentError("Please set the environment variables 'GOOGLE_SEARCH_API_KEY' and 'GOOGLE_SEARCH_ID'.")
         self._request_parameters['q'] = query
 
     def _max_results_reached(self) -> bool:
@@ -48,43 +72,37 @@ class Search:
 
     def _request_json(self) -> Dict[str, Any]:
         """ Sends a request to the API and returns the JSON response. """
-        response = requests.get(self.API_URL, self._request_parameters, timeout=self.TIMEOUT)
+        response = self._session.get(self.API_URL, params=self._request_parameters, timeout=self.TIMEOUT)
         response.raise_for_status()
-        return response.json()
+        return orjson.loads(response.content)
 
     def _attempt_request(self) -> Optional[Dict]:
-        """ Send a request to the API, retry if it fails. """
-        if not self.API_KEY or not self.API_ID:
-            sys.exit("Missing search API key or ID.")
-        for _ in range(self.REQUEST_TRIES):
-            try:
-                return self._request_json()
-            except RequestException as error:
-                print("Search request error:", error)
-                time.sleep(self.SECONDS_BETWEEN_RETRIES)
-        return None
+        """ Send a request to the API, the session retries it if it fails. """
+        try:
+            return self._request_json()
+        except (RequestException, orjson.JSONDecodeError) as error:
+            print("Search request error:", error)
+            return None
 
     def _set_start_index(self, json_response: Dict) -> None:
         """ Updates the 'start' parameter for pagination. """
         next_page_start_index = json_response['queries']['nextPage'][0]['startIndex']
         self._request_parameters['start'] = next_page_start_index
 
-    def _extract_urls(self, json_response: Dict) -> List[str]:
-        """ Converts the JSON response into a list of URLs. """
-        urls = []
-        for item in json_response.get('items', []):
-            if 'link' in item:
-                urls.append(item['link'])
-        return urls
+    def _extract_urls(self, json_response: Dict) -> Iterator[str]:
+        """ Yields the URLs in the JSON response. """
+        for item in json_response.get('items', ()):
+            link = item.get('link')
+            if link:
+                yield link
 
     def _fetch_urls(self) -> List[str]:
         """ Fetches URLs from the API and sets the pagination index. """
         json_response = self._attempt_request()
         if json_response:
             self._set_start_index(json_response)
-            urls = self._extract_urls(json_response)
             remaining = self.MAX_RESULTS - self._total_results
-            urls = urls[:remaining]
+            urls = list(itertools.islice(self._extract_urls(json_response), remaining))
             self._total_results += len(urls)
             return urls
         else:
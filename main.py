@@ -2,6 +2,7 @@ from app.AppManager import AppManager
 
 app = AppManager()
 user_query = app.show_welcome_message()
+app.start_browser()
 user_intent, user_url, search_query = app.rewrite(user_query)
 if user_url:
     urls = [user_url]
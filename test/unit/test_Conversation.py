@@ -1,4 +1,5 @@
 import unittest
+from unittest.mock import patch
 from helper import add_app_to_path
 
 add_app_to_path(levels=3)
@@ -39,7 +40,8 @@ class TestConversation(unittest.TestCase):
         expected_formatted_image_message = {
             "type": "image_url",
             "image_url": {
-                "url": "data:image/png;base64,base64_image"
+                "url": "data:image/png;base64,base64_image",
+                "detail": "low"
             }
         }
         self.assertIn(expected_formatted_image_message, formatted_messages[0]["content"])
@@ -53,5 +55,50 @@ class TestConversation(unittest.TestCase):
         # Check that messages are deleted
         self.assertEqual(len(conversation.messages), 0)
 
+    def test_reset_keeps_system_prompt(self):
+        # Checks that the system prompt survives a reset
+        conversation = Conversation(OpenAiRequest(Gpt4o()))
+        conversation.add_system("Instructions")
+        conversation.add_text("Hello")
+        conversation.reset()
+        self.assertEqual(conversation.messages, [{"role": "system", "content": [{"type": "text", "text": "Instructions"}]}])
+
+    def test_count_tokens(self):
+        # Checks that identical texts are only tokenized once
+        conversation = Conversation(OpenAiRequest(Gpt4o()))
+        tokens = conversation._count_tokens("Hello world")
+        with patch.object(Conversation, 'tokenizer', None):
+            self.assertEqual(conversation._count_tokens("Hello world"), tokens)
+
+    def test_tokenizer_is_shared(self):
+        # Checks that the tokenizer is loaded once for all conversations
+        first = Conversation(OpenAiRequest(Gpt4o()))
+        second = Conversation(OpenAiRequest(Gpt4o()))
+        self.assertIs(first.tokenizer, second.tokenizer)
+
+    def test_input_cost_counts_repeated_texts(self):
+        # Checks that a text sent twice is charged twice but tokenized once
+        conversation = Conversation(OpenAiRequest(Gpt4o()))
+        conversation.add_text("Hello world")
+        conversation.add_text("Hello world")
+        total_cost = Conversation.total_cost
+        conversation._add_input_cost()
+        tokens = conversation._count_tokens("Hello world")
+        expected_cost = 2 * tokens * conversation.model_request.model.input_token_cost
+        self.assertAlmostEqual(Conversation.total_cost - total_cost, expected_cost)
+        self.assertEqual(list(conversation._token_counts), ["Hello world"])
+
+    def test_cached_response_is_free(self):
+        # Checks that answers read from the response cache don't add to the total cost
+        model_request = OpenAiRequest(Gpt4o(), temperature=0)
+        conversation = Conversation(model_request)
+        conversation.add_text("Hello world")
+        def send_cached(messages):
+            model_request.cached_response = True
+        total_cost = Conversation.total_cost
+        with patch.object(model_request, 'send', send_cached), patch.object(model_request, 'get_answer', return_value="Hi"):
+            self.assertEqual(conversation.request_answer(), "Hi")
+        self.assertEqual(Conversation.total_cost, total_cost)
+
 if __name__ == '__main__':
     unittest.main()
@@ -4,6 +4,7 @@ from helper import add_app_to_path
 
 add_app_to_path(levels=3)
 from app.ai.agents.DataLocator import DataLocator
+from app.navigation.Document import Document
 from app.navigation.ExtendedBeautifulSoup import ExtendedBeautifulSoup as BS
 from app.navigation.ExtendedTag import ExtendedTag as Tag
 from app.ai.data.DocumentData import DocumentData as DocumentData
@@ -34,7 +35,70 @@ class TestDataLocator(unittest.TestCase):
         list_a = [1, 2]
         list_b = ['a', 'b']
         expected_pairs = [(1, 'a'), (1, 'b'), (2, 'a'), (2, 'b')]
-        self.assertEqual(self.locator._pairs(list_a, list_b), expected_pairs)
+        self.assertEqual(list(self.locator._pairs(list_a, list_b)), expected_pairs)
+
+    def test_find_lowest_common_ancestor(self):
+        # Checks that the deepest shared ancestor of two elements is found from their ancestor paths
+        soup = BS('<html><body><div id="a"><ul><li>1</li></ul><ul><li>2</li></ul></div></body></html>', 'html.parser')
+        item1, item2 = soup.find_all('li')
+        ancestor_paths = {}
+        path1 = self.locator._get_ancestor_path(item1, ancestor_paths)
+        path2 = self.locator._get_ancestor_path(item2, ancestor_paths)
+        self.assertIs(path1[-1], item1.parent)
+        self.assertIs(self.locator._find_lowest_common_ancestor(path1, path2), soup.find(id='a'))
+
+    def test_filter_data(self):
+        # Checks the proportion of sample strings found in each container, counting repeated strings
+        self.locator._sample_strings = ['Austria', 'Vienna', 'Sweden', 'Stockholm', 'Austria']
+        container1 = BS('<div><p>austria</p><p>Vienna</p><p>Sweden</p></div>', 'html.parser').div
+        container2 = BS('<div><p>Stockholm</p></div>', 'html.parser').div
+        data1 = DocumentData(container1, Mock(), Mock())
+        data2 = DocumentData(container2, Mock(), Mock())
+        filtered_data = self.locator._filter_data([data1, data2])
+        self.assertEqual(filtered_data, [data1])
+        self.assertAlmostEqual(data1.proportion, 0.8)
+        self.assertAlmostEqual(data2.proportion, 0.2)
+
+    def test_get_page_text(self):
+        # Checks that the page text is reused until the document changes
+        self.browser_mock.document = Document(['<html><body><p>Old</p></body></html>'])
+        self.assertEqual(self.locator._get_page_text(), 'Old')
+        self.browser_mock.document.get_text = Mock(return_value='Unexpected')
+        self.assertEqual(self.locator._get_page_text(), 'Old')
+        self.browser_mock.document = Document(['<html><body><p>New</p></body></html>'])
+        self.assertEqual(self.locator._get_page_text(), 'New')
+
+    def test_find_data_structure_same_sample(self):
+        # Checks that the data isn't searched again if the sample and the document don't change
+        self.browser_mock.document.version = 1
+        self.locator._generate_data_sample = Mock(return_value=[{"a": 1, "b": 2}, {"a": 3, "b": 4}])
+        self.locator._locate_sample_data = Mock(return_value=DocumentData())
+        self.locator._find_data_structure("query")
+        self.locator._generate_data_sample.return_value = [{"b": 2, "a": 1}, {"b": 4, "a": 3}]
+        self.locator._find_data_structure("query")
+        self.assertEqual(self.locator._locate_sample_data.call_count, 1)
+        self.browser_mock.document.version = 2
+        self.locator._find_data_structure("query")
+        self.assertEqual(self.locator._locate_sample_data.call_count, 2)
+
+    def test_filter_wrappers(self):
+        # Checks that containers wrapping another container with the same proportion are removed
+        soup = BS('<div id="outer"><div id="inner"><p>1</p></div></div><div id="other"></div>', 'html.parser')
+        outer = DocumentData(soup.find(id='outer'), Mock(), Mock(), 0.5)
+        inner = DocumentData(soup.find(id='inner'), Mock(), Mock(), 0.5)
+        other = DocumentData(soup.find(id='other'), Mock(), Mock(), 0.5)
+        self.assertEqual(self.locator._filter_wrappers([outer, inner, other]), [inner, other])
+        outer.proportion = 0.6
+        self.assertEqual(self.locator._filter_wrappers([outer, inner, other]), [outer, inner, other])
+
+    def test_remove_similar_children(self):
+        # Checks that only distinct children are kept, ignoring id and style, without changing the page
+        html = '<ul class="list"><li id="1" style="color: red;">A</li><li id="2">B</li><li class="last">C</li></ul>'
+        soup = BS(html, 'html.parser')
+        self.browser_mock.document.html = soup
+        pruned = self.locator._remove_similar_children(soup.ul)
+        self.assertEqual(str(pruned), '<ul class="list"><li id="1">A</li><li class="last">C</li></ul>')
+        self.assertEqual(str(soup), html)
 
     def test_filter_unique_containers(self):
         # Checks duplicated data containers are removed
@@ -4,6 +4,7 @@ from helper import add_app_to_path
 add_app_to_path(levels=3)
 from app.navigation.Document import Document
 from app.navigation.ExtendedBeautifulSoup import ExtendedBeautifulSoup as BS
+from app.navigation.ExtendedTag import ExtendedTag as Tag
 
 
 class TestDocument(unittest.TestCase):
@@ -18,24 +19,38 @@ class TestDocument(unittest.TestCase):
         self.doc.update(['<html><body><p>New Document</p></body></html>'])
         self.assertEqual(str(self.doc.body), '<body><p>New Document</p></body>')
 
+    def test_update_unchanged(self):
+        # Updating with the same HTML keeps the parsed body and the version
+        html_list = ['<html><body><p>Same</p></body></html>']
+        self.doc.update(html_list)
+        body, version = self.doc.body, self.doc.version
+        self.doc.update(list(html_list))
+        self.assertIs(self.doc.body, body)
+        self.assertEqual(self.doc.version, version)
+        self.doc.update(['<html><body><p>Changed</p></body></html>'])
+        self.assertGreater(self.doc.version, version)
+
     def test_combine_documents(self):
         # Combining two HTML documents should merge the body contents
         combined = self.doc._combine_documents(['<html><body><p>Doc 1</p></body></html>', '<html><body><p>Doc 2</p></body></html>'])
-        self.assertEqual(str(combined), '<html><body><p>Doc 1</p><p>Doc 2</p></body></html>')
-
-    def test_find_common_ancestor(self):
-        # Finding a tag from a CSS selector
-        element1 = self.doc.body.select_one('p:contains("Hello World")')
-        element2 = self.doc.body.select_one('p:contains("Another Document")')
-        common_ancestor = self.doc.find_common_ancestor(element1, element2)
-        self.assertEqual(str(common_ancestor), '<body><p>  Hello World  </p><p>Another Document</p></body>')
-
-    def test_copy_tag(self):
-        # Test copying a tag with nested elements and attributes
-        source_tag = BS('<div class="test"><p>Hello <span style="color: red;">World</span></p></div>', 'html.parser').div
-        dest_soup = BS('<html><body></body></html>', 'html.parser')
-        copied_tag = self.doc._copy_tag(source_tag, dest_soup)
-        self.assertEqual(str(copied_tag), str(source_tag))
+        self.assertEqual(str(combined.body), '<body><p>Doc 1</p><p>Doc 2</p></body>')
+        self.assertTrue(all(isinstance(p, Tag) for p in combined.find_all('p')))
+
+    def test_combine_documents_uppercase_tags(self):
+        # Test if documents with uppercase or mixed case body tags are combined
+        combined = self.doc._combine_documents(['<HTML><BODY><p>a</p></BODY></HTML>', '<html><Body><p>b</p></Body ></html>'])
+        self.assertEqual(str(combined.body), '<body><p>a</p><p>b</p></body>')
+
+    def test_combine_documents_skips_head(self):
+        # Only the body is parsed, the head is left out of the tree
+        combined = self.doc._combine_documents(['<html><head><title>Title</title></head><body><p>Doc</p></body></html>'])
+        self.assertIsNone(combined.find('title'))
+        self.assertEqual(str(combined.body), '<body><p>Doc</p></body>')
+
+    def test_get_body_contents(self):
+        # Test extracting the html between the body tags of a document
+        self.assertEqual(self.doc._get_body_contents('<html><body class="a"><p>Text</p></body></html>'), '<p>Text</p>')
+        self.assertEqual(self.doc._get_body_contents('<html><head></head></html>'), '')
 
     def test_get_text(self):
         # Test if get_text extracts tag strings in different lines, handles comments and shortens long strings
@@ -45,6 +60,41 @@ class TestDocument(unittest.TestCase):
         expected = 'Short text This is longer text that should be truncated because it exceeds the maximum length of 120 characters set in the get_text...'
         self.assertEqual(result, expected)
 
+    def test_get_text_skips_scripts(self):
+        # Test if get_text keeps the document order, skips scripts and styles and leaves the body unchanged
+        html = '<html><body><div>One <b>two</b><script>var a;</script></div><style>p {}</style><p>three</p></body></html>'
+        self.doc.update([html])
+        self.assertEqual(self.doc.get_text(120), 'One two three')
+        self.assertIsNotNone(self.doc.body.find('script'))
+
+    def test_get_text_cache(self):
+        # Test if get_text results are reused until the document is updated
+        self.doc.update(['<html><body><p>Cached text</p></body></html>'])
+        self.assertEqual(self.doc.get_text(120), 'Cached text')
+        self.doc.body.p.string = 'Changed text'
+        self.assertEqual(self.doc.get_text(120), 'Cached text')
+        self.doc.update(['<html><body><p>New text</p></body></html>'])
+        self.assertEqual(self.doc.get_text(120), 'New text')
+
+    def test_find_elements_by_texts(self):
+        # Test if the elements that contain each string are found in a single call
+        html = '<html><body><p> A </p><div><span>B</span></div><p>A</p><p>C D</p></body></html>'
+        self.doc.update([html])
+        elements = self.doc.find_elements_by_texts(['A', 'B', 'E'])
+        self.assertEqual([str(element) for element in elements['A']], ['<p> A </p>', '<p>A</p>'])
+        self.assertEqual([element.name for element in elements['B']], ['div', 'span'])
+        self.assertEqual(elements['E'], [])
+        self.assertEqual(elements['A'], self.doc.find_elements_by_text('A'))
+
+    def test_find_elements_by_texts_mixed_content(self):
+        # Test if tags with more than the searched string are not found
+        html = '<html><body><p>A<b>B</b></p><div> <i>C</i></div></body></html>'
+        self.doc.update([html])
+        elements = self.doc.find_elements_by_texts(['A', 'B', 'C'])
+        self.assertEqual(elements['A'], [])
+        self.assertEqual([element.name for element in elements['B']], ['b'])
+        self.assertEqual([element.name for element in elements['C']], ['i'])
+
     def test_find_ancestors(self):
         # Test if the tags from tag A to tag D are found, in descending order
         html = '<html><body id="D"><div id="C"><div id="B"><p id="A">Test</p></div></div></body></html>'
@@ -65,6 +115,14 @@ class TestDocument(unittest.TestCase):
         self.assertEqual(len(parent.contents), 2)
         self.assertIsNone(parent.find(id='target'))
 
+    def test_get_family_identical_tag_before(self):
+        # Test if the element itself is removed when an identical tag comes before it
+        html = '<html><body><div><section><p>Inner</p></section><p>Target</p></div></body></html>'
+        self.doc.update([html])
+        target = self.doc.body.find_all('p')[1]
+        parent = self.doc.get_family(target)
+        self.assertEqual(str(parent), '<div><section><p>Inner</p></section></div>')
+
     def test_find_distinct_children(self):
         # Create a sample HTML structure
         html = '''<div><p class="test">Paragraph 1</p><p class="test">Paragraph 2</p><span>Span 1</span><p class="different">Paragraph 3</p><span>Span 2</span></div>'''
@@ -32,11 +32,30 @@ class TestExtendedTag(unittest.TestCase):
         self.soup = BS(self.html, 'html.parser')
         self.extended_tag = self.soup.body
 
+    def test_soup_creates_extended_tags(self):
+        # Test if parsed tags and tags created with new_tag are ExtendedTags
+        self.assertTrue(all(isinstance(tag, Tag) for tag in self.soup.find_all()))
+        self.assertIsInstance(self.soup.new_tag('div'), Tag)
+
     def test_is_identical_to(self):
         # Test if two tags with the same name and attributes (excluding id) are identical
         tag1 = Tag(name='div', attrs={'class': 'test', 'id': '1'})
         tag2 = Tag(name='div', attrs={'class': 'test', 'id': '2'})
         self.assertTrue(tag1.is_identical_to(tag2))
+        self.assertTrue(tag1.is_identical_to(Tag(name='div', attrs={'class': 'test'})))
+        self.assertFalse(tag1.is_identical_to(Tag(name='div', attrs={'class': 'other', 'id': '1'})))
+        self.assertFalse(tag1.is_identical_to(Tag(name='div', attrs={'title': 'test', 'id': '1'})))
+        self.assertFalse(tag1.is_identical_to(Tag(name='div', attrs={'class': 'test', 'title': 't'})))
+        self.assertFalse(tag1.is_identical_to(Tag(name='p', attrs={'class': 'test'})))
+
+    def test_similarity_key(self):
+        # Test if identical tags have the same key, regardless of ignored attributes and attribute order
+        tag1 = Tag(name='div', attrs={'class': ['a', 'b'], 'id': '1', 'title': 't'})
+        tag2 = Tag(name='div', attrs={'title': 't', 'class': ['a', 'b'], 'id': '2'})
+        tag3 = Tag(name='div', attrs={'class': ['a'], 'title': 't'})
+        self.assertEqual(tag1.similarity_key(), tag2.similarity_key())
+        self.assertNotEqual(tag1.similarity_key(), tag3.similarity_key())
+        self.assertEqual(hash(tag1.similarity_key()), hash(tag2.similarity_key()))
 
     def test_is_text_tag(self):
         # Test if a paragraph tag is recognized as a text tag
@@ -83,6 +102,31 @@ class TestExtendedTag(unittest.TestCase):
         self.assertEqual(original.name, copy.name)
         self.assertEqual(original.attrs, copy.attrs)
 
+    def test_copy_is_independent(self):
+        # Test if the copy keeps the contents and changing it doesn't change the original
+        original = BS('<div class="a b"><p>One &amp; two</p><span>Three</span></div>').div
+        copy = original.copy()
+        self.assertIsInstance(copy, Tag)
+        self.assertIsNone(copy.parent)
+        self.assertEqual(str(copy), str(original))
+        copy.p.decompose()
+        self.assertIsNotNone(original.p)
+
+    def test_copy_large_tag(self):
+        # Test if large tags, copied by re-parsing their HTML, are equal and detached
+        original = BS('<ul class="list">' + ''.join(f'<li id="{i}">Item &amp; {i}</li>' for i in range(100)) + '</ul>').ul
+        copy = original.copy()
+        self.assertIsInstance(copy, Tag)
+        self.assertIsNone(copy.parent)
+        self.assertEqual(str(copy), str(original))
+        self.assertIsNot(copy.li, original.li)
+
+    def test_copy_tag_changed_by_parser(self):
+        # Test if tags that can't be parsed on their own are still copied
+        row = BS('<table><tr><td>Cell</td></tr></table>').tr
+        copy = row.copy()
+        self.assertEqual(str(copy), str(row))
+
     def test_shorten_text(self):
         # Test if text content is shortened correctly
         div = Tag(name='div')
@@ -92,6 +136,12 @@ class TestExtendedTag(unittest.TestCase):
         div.shorten_text(1)
         self.assertEqual(p.string, 'T...')
 
+    def test_shorten_text_keeps_tags(self):
+        # Test if nested tags are kept and only strings that are the whole content of a tag are shortened
+        div = BS('<div><p><b>Long text</b></p><p>Long text <i>and more</i></p></div>').div
+        div.shorten_text(4)
+        self.assertEqual(str(div), '<div><p><b>Long...</b></p><p>Long text <i>and ...</i></p></div>')
+
     def test_remove_tags(self):
         # Test if specified tags are removed from the element
         parent = Tag(name='div')
@@ -116,5 +166,24 @@ class TestExtendedTag(unittest.TestCase):
         self.assertEqual(img['src'], 'https://example.com/very/long/ ...')
         self.assertEqual(iframe['src'], 'https://example.com/embed/very ...')
 
+    def test_clean(self):
+        # Test if cleaning in a single pass gives the same result as calling each method
+        tags, attributes = ['script', 'style'], ['id', 'style', 'width']
+        expected = BS(self.html, 'html.parser').body
+        expected.shorten_text(20).remove_comments().remove_tags(tags).clear_svg_contents().strip_attributes(attributes).shorten_src(30)
+        self.extended_tag.clean(tags, attributes, max_text=20, max_src=30)
+        self.assertEqual(str(self.extended_tag), str(expected))
+
+    def test_clean_comment_in_cleared_svg(self):
+        # Test if comments inside svg children, removed with them, don't break the cleaning
+        div = BS('<div><svg><g><!-- c --><path/></g></svg><!-- d --><p>Text</p></div>').div
+        div.clean(['script'], ['id'], max_text=20, max_src=30)
+        self.assertEqual(str(div), '<div><svg></svg><p>Text</p></div>')
+
+    def test_minify(self):
+        # Test if each run of whitespace is collapsed into a single space
+        div = BS('<div>\n  <p>Some   text</p>\n\n  <b>a</b> <i>b</i>\n</div>').div
+        self.assertEqual(div.minify(), '<div> <p>Some text</p> <b>a</b> <i>b</i> </div>')
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
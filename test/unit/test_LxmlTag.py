@@ -0,0 +1,81 @@
+import unittest
+from helper import add_app_to_path
+
+add_app_to_path(levels=3)
+from app.navigation.ExtendedBeautifulSoup import ExtendedBeautifulSoup as BS
+from app.navigation.LxmlTag import LxmlTag
+
+
+class TestLxmlTag(unittest.TestCase):
+
+    def setUp(self):
+
+        # Set up an HTML fragment to use in tests
+        self.html = '''<div>
+            <!-- Remove this comment -->
+            <p id="p1" style="color:red;">This is a long paragraph that should be shortened.</p>
+            <script>Remove this script</script>
+            <svg><path d="M0 0"></path></svg>
+            <img src="https://example.com/very/long/path/to/image1.jpg" alt="Image 1">
+        </div>
+        <div>Second root</div>'''
+        self.tag = LxmlTag(self.html)
+
+    def test_from_tag(self):
+        # Test if a BeautifulSoup tag is parsed with its own root element
+        soup = BS('<body><table><tr><td>Cell</td></tr></table></body>', 'html.parser')
+        self.assertEqual(str(LxmlTag.from_tag(soup.table)), '<table><tr><td>Cell</td></tr></table>')
+
+    def test_keeps_several_roots(self):
+        # Test if fragments with more than one root element are kept whole
+        self.assertEqual(len(self.tag.root), 2)
+        self.assertIn('Second root', str(self.tag))
+
+    def test_shorten_text(self):
+        # Test if text content is shortened correctly
+        self.tag.shorten_text(4)
+        self.assertEqual(self.tag.root.find('.//p').text, 'This...')
+
+    def test_remove_tags(self):
+        # Test if specified tags are removed from the element
+        self.tag.remove_tags(['script'])
+        self.assertIsNone(self.tag.root.find('.//script'))
+
+    def test_remove_comments(self):
+        # Test if comments are removed
+        self.tag.remove_comments()
+        self.assertNotIn('Remove this comment', str(self.tag))
+
+    def test_clear_svg_contents(self):
+        # Test if svg children are removed, keeping the svg tag
+        self.tag.clear_svg_contents()
+        self.assertIsNotNone(self.tag.root.find('.//svg'))
+        self.assertIsNone(self.tag.root.find('.//path'))
+
+    def test_strip_attributes(self):
+        # Test if specified attributes are stripped from all elements
+        self.tag.strip_attributes(['id', 'style'])
+        p = self.tag.root.find('.//p')
+        self.assertNotIn('id', p.attrib)
+        self.assertNotIn('style', p.attrib)
+
+    def test_shorten_src_attributes(self):
+        # Test if src attributes are shortened correctly
+        self.tag.shorten_src(max_length=30)
+        self.assertEqual(self.tag.root.find('.//img').get('src'), 'https://example.com/very/long/ ...')
+
+    def test_minify(self):
+        # Test if whitespace between tags is removed
+        html = self.tag.remove_comments().minify()
+        self.assertNotIn('\n', html)
+
+    def test_clean(self):
+        # Test if cleaning in a single pass gives the same result as calling each method
+        tags, attributes = ['script'], ['id', 'style']
+        expected = LxmlTag(self.html)
+        expected.shorten_text(4).remove_comments().remove_tags(tags).clear_svg_contents().strip_attributes(attributes).shorten_src(30)
+        self.tag.clean(tags, attributes, max_text=4, max_src=30)
+        self.assertEqual(str(self.tag), str(expected))
+
+if __name__ == '__main__':
+    unittest.main()
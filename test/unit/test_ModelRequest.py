@@ -1,5 +1,6 @@
 import unittest
 import textwrap
+from unittest.mock import MagicMock
 from helper import add_app_to_path
 
 add_app_to_path(levels=3)
@@ -28,6 +29,34 @@ class TestModelRequest(unittest.TestCase):
         # Test with no code block
         no_code_block = "This is just plain text with no code block."
         self.assertEqual(model_request.extract_script(no_code_block), no_code_block)
+        # Test with a code block that is never closed
+        unclosed = "```python\nprint(1)"
+        self.assertEqual(model_request.extract_script(unclosed), unclosed)
+
+    def test_stream_script(self):
+        # Checks that streaming stops once the python code block is closed
+        model_request = AnthropicRequest(Claude35Sonnet(), python_response=True)
+        chunks = ["Strategy...\n``", "`python\nprint(1)\n`", "``", "\nExtra text", " never read"]
+        stream = MagicMock()
+        stream.__enter__.return_value.text_stream = iter(chunks)
+        model_request.client = MagicMock()
+        model_request.client.messages.stream.return_value = stream
+        model_request.send([{"role": "user", "content": [{"type": "text", "text": "Scrape"}]}])
+        self.assertEqual(model_request.get_answer(), "Strategy...\n```python\nprint(1)\n```")
+        self.assertEqual(model_request.extract_script(model_request.get_answer()), "print(1)")
+
+    def test_read_until_script_end(self):
+        # Checks that text after the code block is dropped and answers without code are read whole
+        answer = "```python\nprint(1)\n``` Extra text"
+        self.assertEqual(ModelRequest.read_until_script_end([answer]), answer)
+        self.assertEqual(ModelRequest.read_until_script_end(["```py", "thon\nprint(1)\n`", "``", " Extra"]), "```python\nprint(1)\n```")
+        self.assertEqual(ModelRequest.read_until_script_end(["No ", "code"]), "No code")
+
+    def test_client_is_shared(self):
+        # Checks that all requests reuse the same API client and its connections
+        first = AnthropicRequest(Claude35Sonnet())
+        second = AnthropicRequest(Claude35Sonnet(), python_response=True)
+        self.assertIs(first.client, second.client)
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
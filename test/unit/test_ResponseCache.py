@@ -0,0 +1,40 @@
+import unittest
+import tempfile
+from helper import add_app_to_path
+
+add_app_to_path(levels=3)
+from app.ai.services.ResponseCache import ResponseCache
+
+
+class TestResponseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = ResponseCache(self.directory.name)
+        self.cache.enabled = True
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_get_key(self):
+        # Identical requests have the same key regardless of dictionary order
+        key1 = self.cache.get_key({"model": "gpt-4o", "messages": [{"role": "user", "content": "Hi"}]})
+        key2 = self.cache.get_key({"messages": [{"role": "user", "content": "Hi"}], "model": "gpt-4o"})
+        key3 = self.cache.get_key({"model": "gpt-4o-mini", "messages": [{"role": "user", "content": "Hi"}]})
+        self.assertEqual(key1, key2)
+        self.assertNotEqual(key1, key3)
+
+    def test_get_and_set(self):
+        # Stored responses are returned, missing ones return None
+        self.assertIsNone(self.cache.get("key"))
+        self.cache.set("key", '{"answer": 42}')
+        self.assertEqual(self.cache.get("key"), '{"answer": 42}')
+
+    def test_disabled(self):
+        # Nothing is stored or returned when the cache is disabled
+        self.cache.enabled = False
+        self.cache.set("key", "response")
+        self.assertIsNone(self.cache.get("key"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,19 @@
+import unittest
+from helper import add_app_to_path
+
+add_app_to_path(levels=3)
+from app.ai.data.ScrapedData import ScrapedData
+
+
+class TestScrapedData(unittest.TestCase):
+
+    def setUp(self):
+        self.data = ScrapedData("data0", "https://example.com", [{"id": i} for i in range(1000)])
+
+    def test_str_does_not_serialize_content(self):
+        # Checks that str and repr only describe the data
+        self.assertEqual(str(self.data), "<ScrapedData data0 len=1000>")
+        self.assertNotIn("'id'", repr(self.data))
+
+if __name__ == '__main__':
+    unittest.main()
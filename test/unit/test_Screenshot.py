@@ -1,4 +1,5 @@
 import unittest
+from unittest.mock import patch
 from PIL import Image
 import io
 import base64
@@ -38,5 +39,25 @@ class TestScreenshot(unittest.TestCase):
         decoded = base64.b64decode(base64_str)
         self.assertEqual(decoded, self.png_data)
 
+    def test_as_base64_resized(self):
+        # Encode a resized image as a base64 PNG
+        screenshot = Screenshot(self.png_data)
+        screenshot.max_width = 25
+        screenshot.reduce_image_size()
+        image = Image.open(io.BytesIO(base64.b64decode(screenshot.as_base64())))
+        self.assertEqual(image.format, 'PNG')
+        self.assertEqual(image.size, (25, 25))
+
+    def test_as_base64_encodes_once(self):
+        # The resized image is encoded as PNG only once, later calls reuse the bytes
+        screenshot = Screenshot(self.png_data)
+        screenshot.max_width = 25
+        screenshot.reduce_image_size()
+        with patch.object(screenshot.image, 'save', wraps=screenshot.image.save) as save:
+            first = screenshot.as_base64()
+            second = screenshot.as_base64()
+        self.assertEqual(first, second)
+        self.assertEqual(save.call_count, 1)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
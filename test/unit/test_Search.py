@@ -1,4 +1,5 @@
 import unittest
+from unittest.mock import MagicMock, patch
 from helper import add_app_to_path
 
 add_app_to_path(levels=3)
@@ -8,6 +9,11 @@ from app.search.Search import Search
 class TestSearch(unittest.TestCase):
 
     def setUp(self):
+        # The tests send no requests, so they don't need real credentials
+        for attribute in ('API_KEY', 'API_ID'):
+            credential_patch = patch.object(Search, attribute, 'test')
+            credential_patch.start()
+            self.addCleanup(credential_patch.stop)
         self.search = Search()
         self.search.set_query("Test query")
 
@@ -33,8 +39,33 @@ class TestSearch(unittest.TestCase):
     def test_extract_urls(self):
         # Check if the URLs are extracted correctly from the JSON response
         json_response = {"items": [{"link": "https://example.com"}]}
-        actual_urls = self.search._extract_urls(json_response)
+        actual_urls = list(self.search._extract_urls(json_response))
         self.assertEqual(actual_urls, ["https://example.com"])
 
+    def test_session_retries(self):
+        # Check if the session retries failed requests instead of a manual loop
+        adapter = self.search._session.get_adapter(Search.API_URL)
+        self.assertEqual(adapter.max_retries.total, Search.REQUEST_TRIES - 1)
+        self.assertEqual(adapter.max_retries.backoff_factor, Search.SECONDS_BETWEEN_RETRIES)
+
+    def test_session_is_shared(self):
+        # Check if all searches reuse the same session and its connections
+        self.assertIs(Search()._session, self.search._session)
+
+    def test_missing_credentials(self):
+        # Check if a search without API key fails before any request is sent
+        search = Search()
+        search.API_KEY = None
+        with self.assertRaises(EnvironmentError):
+            search.set_query("Test query")
+
+    def test_attempt_request_parses_json(self):
+        # Check if the response body is parsed, and invalid JSON is handled like a failed request
+        response = MagicMock(content=b'{"items": [{"link": "https://example.com"}]}')
+        with patch.object(self.search._session, 'get', return_value=response):
+            self.assertEqual(self.search._attempt_request(), {"items": [{"link": "https://example.com"}]})
+            response.content = b'<html>Error</html>'
+            self.assertIsNone(self.search._attempt_request())
+
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()
@@ -0,0 +1,24 @@
+import unittest
+from helper import add_app_to_path
+
+add_app_to_path(levels=3)
+from app.ai.agents.Validator import Validator
+from app.ai.data.ScrapedData import ScrapedData
+
+
+class TestValidator(unittest.TestCase):
+
+    def test_get_data_item_sample(self):
+        # Checks that the first and middle objects are sampled and an ellipsis is added
+        data = ScrapedData('data1.json', 'https://example.com', [{"n": i} for i in range(10)])
+        self.assertEqual(Validator.get_data_item_sample(data), '[{"n":0},{"n":5}, ...]')
+        # Checks that short lists are returned complete
+        data = ScrapedData('data1.json', 'https://example.com', [{"n": 0}])
+        self.assertEqual(Validator.get_data_item_sample(data), '[{"n":0}]')
+
+    def test_data_not_shared(self):
+        # Checks that the data list is not a class attribute shared by all validators
+        self.assertFalse(hasattr(Validator, 'data'))
+
+if __name__ == '__main__':
+    unittest.main()